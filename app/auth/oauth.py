@@ -1,14 +1,27 @@
-from authlib.integrations.starlette_client import OAuth
+import threading
 from app.config import settings
 
-oauth = OAuth()
-
-oauth.register(
-    name='google',
-    client_id=settings.GOOGLE_CLIENT_ID,
-    client_secret=settings.GOOGLE_CLIENT_SECRET,
-    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-    client_kwargs={
-        'scope': 'openid email profile'
-    }
-)
+_oauth = None
+_oauth_lock = threading.Lock()
+
+
+def get_oauth():
+    """The OAuth registry with Google registered, built on first use so authlib loads lazily."""
+    global _oauth
+    if _oauth is None:
+        with _oauth_lock:
+            if _oauth is None:
+                from authlib.integrations.starlette_client import OAuth
+
+                oauth = OAuth()
+                oauth.register(
+                    name='google',
+                    client_id=settings.GOOGLE_CLIENT_ID,
+                    client_secret=settings.GOOGLE_CLIENT_SECRET,
+                    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
+                    client_kwargs={
+                        'scope': 'openid email profile'
+                    }
+                )
+                _oauth = oauth
+    return _oauth
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Request, Depends, HTTPException
 from fastapi.responses import RedirectResponse, JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from app.auth.oauth import oauth
+from app.auth.oauth import get_oauth
+from app.auth.tokens import issue_access_token
+from app.services.user_cache import user_cache
 from app.database import get_db
 from app.models.user import User
 from app.config import settings
@@ -10,9 +11,7 @@ import urllib.parse
 import secrets
 import string
 import json
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.services.passwords import password_hasher
 
 router = APIRouter()
 
@@ -44,13 +43,14 @@ async def login_with_google(request: Request, allow_signup: bool = False):
     request.session['allow_signup'] = allow_signup
     
     redirect_uri = f"{settings.BACKEND_URL}/api/auth/google/callback"
-    return await oauth.google.authorize_redirect(request, redirect_uri)
+    return await get_oauth().google.authorize_redirect(request, redirect_uri)
 
 @router.get("/google/callback")
 async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
     """Handle Google OAuth callback"""
     try:
         # Get the access token from Google
+        oauth = get_oauth()
         token = await oauth.google.authorize_access_token(request)
         
         # Get user info using the access token
@@ -58,8 +58,7 @@ async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
         user_info = resp.json()
 
         # Check if user exists
-        result = await db.execute(select(User).where(User.email == user_info["email"]))
-        user = result.scalar_one_or_none()
+        user = await user_cache.get_by_email(db, user_info["email"])
         
         # Get the allow_signup preference from session
         allow_signup = request.session.get('allow_signup', False)
@@ -75,7 +74,8 @@ async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
             is_new_user = True
             # Generate a secure password for Google OAuth users
             secure_password = generate_secure_password()
-            hashed_password = pwd_context.hash(secure_password)
+            # Off the event loop; if the pool is saturated the error redirect below handles it
+            hashed_password = await password_hasher.hash(secure_password)
             
             # Create new user from Google info
             user = User(
@@ -86,20 +86,23 @@ async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
             db.add(user)
             await db.commit()
             await db.refresh(user)
+            user_cache.put(user)
 
         # Create user data for frontend
         user_data = {
             "id": user.id,
             "name": user.name,
             "email": user.email,
-            "is_new_user": is_new_user
+            "is_new_user": is_new_user,
+            **issue_access_token(user)
         }
 
         # Properly encode user data as JSON for URL
         user_json = urllib.parse.quote(json.dumps(user_data))
         
-        # Redirect to frontend with user data
-        frontend_url = f"{settings.FRONTEND_URL}/auth-success?user={user_json}"
+        # Redirect to frontend with user data in the fragment: browsers never send it to a
+        # server, so the access token stays out of access logs, proxies and Referer headers
+        frontend_url = f"{settings.FRONTEND_URL}/auth-success#user={user_json}"
         return RedirectResponse(url=frontend_url)
 
     except Exception as e:
@@ -0,0 +1,143 @@
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from app.config import settings
+
+
+class TokenUser(NamedTuple):
+    id: int
+    name: str
+    email: str
+
+
+class InvalidToken(Exception):
+    """Raised for tokens that are malformed, tampered with or expired."""
+
+
+class TokensNotConfigured(Exception):
+    """Raised when no signing secret is configured, so tokens can't be issued safely."""
+
+
+class AccessTokens:
+    """Signed, expiring bearer tokens carrying the user's id, name and email.
+
+    Verification is an HMAC check, so it never touches the database. Recently verified tokens
+    are kept in a small LRU together with their expiry, so repeat requests skip even that.
+    Without a secret every issue and verify is refused: a well-known key would let anyone
+    forge a token for any user.
+    """
+
+    def __init__(self, secret: Optional[str], ttl_seconds: int, cache_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.cache_entries = cache_entries
+        self._serializer = URLSafeTimedSerializer(secret, salt="access-token") if secret else None
+        self._verified: OrderedDict = OrderedDict()
+        self.issued = 0
+        self.cache_hits = 0
+        self.verified = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._serializer is not None
+
+    def issue(self, user_id: int, name: str, email: str) -> str:
+        if not self.enabled:
+            raise TokensNotConfigured("Access tokens are disabled: set ACCESS_TOKEN_SECRET or SESSION_SECRET_KEY")
+        self.issued += 1
+        return self._serializer.dumps({"id": user_id, "name": name, "email": email})
+
+    def verify(self, token: str) -> TokenUser:
+        if not self.enabled:
+            self.rejected += 1
+            raise InvalidToken("Access tokens are not configured on this server")
+        cached = self._verified.get(token)
+        if cached is not None:
+            user, expires_at = cached
+            if expires_at > time.time():
+                self._verified.move_to_end(token)
+                self.cache_hits += 1
+                return user
+            del self._verified[token]
+
+        try:
+            payload, signed_at = self._serializer.loads(token, max_age=self.ttl_seconds, return_timestamp=True)
+            user = TokenUser(id=int(payload["id"]), name=payload["name"], email=payload["email"])
+        except SignatureExpired:
+            self.rejected += 1
+            raise InvalidToken("Access token expired")
+        except (BadSignature, KeyError, TypeError, ValueError):
+            self.rejected += 1
+            raise InvalidToken("Invalid access token")
+
+        self.verified += 1
+        self._verified[token] = (user, signed_at.timestamp() + self.ttl_seconds)
+        while len(self._verified) > self.cache_entries:
+            self._verified.popitem(last=False)
+        return user
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl_seconds,
+            "cached": len(self._verified),
+            "issued": self.issued,
+            "cache_hits": self.cache_hits,
+            "verified": self.verified,
+            "rejected": self.rejected,
+        }
+
+
+access_tokens = AccessTokens(
+    secret=settings.ACCESS_TOKEN_SECRET,
+    ttl_seconds=settings.ACCESS_TOKEN_TTL_SECONDS,
+    cache_entries=settings.ACCESS_TOKEN_CACHE_ENTRIES,
+)
+
+if not access_tokens.enabled:
+    print("Warning: ACCESS_TOKEN_SECRET/SESSION_SECRET_KEY not set to a real secret; logins will fail until one is configured")
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def issue_access_token(user) -> dict:
+    """Token fields to add to a login response for a User row."""
+    try:
+        access_token = access_tokens.issue(user.id, user.name, user.email)
+    except TokensNotConfigured as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": access_tokens.ttl_seconds,
+    }
+
+
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
+) -> Optional[TokenUser]:
+    """The caller's identity from `Authorization: Bearer <token>`, or None without one."""
+    if credentials is None:
+        return None
+    try:
+        return access_tokens.verify(credentials.credentials)
+    except InvalidToken as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+
+async def get_current_user(user: Optional[TokenUser] = Depends(get_optional_user)) -> TokenUser:
+    """Dependency for routes that require a signed-in user."""
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return user
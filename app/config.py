@@ -7,9 +7,20 @@ env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.env')
 # Load environment variables from .env (for local development)
 load_dotenv(dotenv_path=env_path)
 
+# Example values from this repo; never accepted as signing secrets
+PLACEHOLDER_SECRETS = {
+    "your-secret-key-for-oauth-sessions-change-in-production",
+    "your-random-secret-key-change-in-production",
+}
+
 class Settings:
     PROJECT_NAME = "PeerPilates"
     
+    # Fast start: skip create_all on boot (run `alembic upgrade head` out of band instead) and
+    # defer startup database work; heavy SDKs load in the background WARMUP_DELAY_SECONDS after boot
+    FAST_START = os.getenv("FAST_START", "false").lower() in ("1", "true", "yes")
+    WARMUP_DELAY_SECONDS = float(os.getenv("WARMUP_DELAY_SECONDS", "1"))
+    
     # Database URL - handle Render's postgres:// vs postgresql+asyncpg://
     _db_url = os.getenv("DATABASE_URL", "")
     if _db_url.startswith("postgres://"):
@@ -18,6 +29,15 @@ class Settings:
         DATABASE_URL = _db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
     else:
         DATABASE_URL = _db_url
+    # Connection pool (Postgres only); pre-ping drops connections the server closed while idle
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    # Per-connection prepared statement caches; 0 disables (needed behind PgBouncer transaction pooling)
+    DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "100"))
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
     
     # URLs
     BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
@@ -29,8 +49,84 @@ class Settings:
 
     # Gemini
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    # Max Gemini calls running at once, and how many more may wait for a slot
+    GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+    GEMINI_MAX_QUEUE = int(os.getenv("GEMINI_MAX_QUEUE", "32"))
+    # Upstream resilience: per-call deadline, circuit breaker, hedged retries (0 percentile = off)
+    GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "25"))
+    # Whole streamed answer, enforced by the SDK so a stalled stream frees its worker thread
+    GEMINI_STREAM_TIMEOUT_SECONDS = float(os.getenv("GEMINI_STREAM_TIMEOUT_SECONDS", "120"))
+    GEMINI_BREAKER_FAILURES = int(os.getenv("GEMINI_BREAKER_FAILURES", "5"))
+    GEMINI_BREAKER_RESET_SECONDS = float(os.getenv("GEMINI_BREAKER_RESET_SECONDS", "30"))
+    GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "0"))
+    GEMINI_HEDGE_MIN_SAMPLES = int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", "20"))
+
+    # /api/ai-agent/chat/batch limits
+    CHAT_BATCH_MAX_ITEMS = int(os.getenv("CHAT_BATCH_MAX_ITEMS", "50"))
+    CHAT_BATCH_CONCURRENCY = int(os.getenv("CHAT_BATCH_CONCURRENCY", "8"))
+
+    # Chat history write-behind queue
+    CHAT_HISTORY_BATCH_SIZE = int(os.getenv("CHAT_HISTORY_BATCH_SIZE", "100"))
+    CHAT_HISTORY_FLUSH_SECONDS = float(os.getenv("CHAT_HISTORY_FLUSH_SECONDS", "1.0"))
+    CHAT_HISTORY_MAX_QUEUE = int(os.getenv("CHAT_HISTORY_MAX_QUEUE", "10000"))
+
+    # AI answer cache (in-process LRU in front of a shared Postgres table)
+    CHAT_CACHE_TTL_SECONDS = int(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600"))
+    CHAT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "1024"))
+    CHAT_CACHE_DB_ENABLED = os.getenv("CHAT_CACHE_DB_ENABLED", "true").lower() == "true"
+    # How often a worker deletes expired chat_cache rows, piggybacked on a cache write
+    CHAT_CACHE_PURGE_INTERVAL_SECONDS = int(os.getenv("CHAT_CACHE_PURGE_INTERVAL_SECONDS", "600"))
+
+    # Retrieval over uploaded documents (chunks sent to Gemini instead of the first 2000 chars)
+    RETRIEVAL_MAX_DOCUMENTS = int(os.getenv("RETRIEVAL_MAX_DOCUMENTS", "256"))
+    RETRIEVAL_CHUNK_WORDS = int(os.getenv("RETRIEVAL_CHUNK_WORDS", "120"))
+    RETRIEVAL_CHUNK_OVERLAP = int(os.getenv("RETRIEVAL_CHUNK_OVERLAP", "20"))
+    RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "4"))
+    RETRIEVAL_TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", "800"))
+    
+    # Uploads
+    MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", str(10 * 1024 * 1024)))  # bytes, checked while streaming
+    # PDF text extraction runs in a process pool and stops once it has this many characters
+    PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+    PDF_EXTRACT_TIMEOUT_SECONDS = float(os.getenv("PDF_EXTRACT_TIMEOUT_SECONDS", "30"))
+    PDF_EXTRACT_MAX_CHARS = int(os.getenv("PDF_EXTRACT_MAX_CHARS", "100000"))
+    # Background extraction jobs (POST /api/files/upload?background=true)
+    EXTRACTION_JOB_WORKERS = int(os.getenv("EXTRACTION_JOB_WORKERS", "2"))
+    EXTRACTION_JOB_STALE_SECONDS = float(os.getenv("EXTRACTION_JOB_STALE_SECONDS", "300"))
+    
+    # Per-worker cache of user rows for login/signup lookups; unknown emails are remembered briefly
+    USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+    USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+    USER_CACHE_NEGATIVE_TTL_SECONDS = int(os.getenv("USER_CACHE_NEGATIVE_TTL_SECONDS", "30"))
+    
+    # Password hashing (bcrypt runs on a bounded thread pool; beyond the queue logins get 503)
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+    # Bulk user import (POST /api/users/import, import_users.py); the endpoint is off without a token
+    USER_IMPORT_TOKEN = os.getenv("USER_IMPORT_TOKEN")
+    # Concurrent hashes per import: over HTTP capped at half of PASSWORD_HASH_WORKERS, all of them in import_users.py
+    USER_IMPORT_HASH_WORKERS = int(os.getenv("USER_IMPORT_HASH_WORKERS", str(os.cpu_count() or 1)))
+    
+    # gzip for responses (JSON, text) when the client accepts it; smaller bodies go out as is
+    COMPRESSION_MINIMUM_BYTES = int(os.getenv("COMPRESSION_MINIMUM_BYTES", "1024"))
+    COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+    
+    # Metrics (GET /metrics); how often event-loop lag is sampled, 0 to turn sampling off
+    EVENT_LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("EVENT_LOOP_LAG_INTERVAL_SECONDS", "0.5"))
     
     # Session
     SESSION_SECRET_KEY = os.getenv("SESSION_SECRET_KEY", "your-secret-key-for-oauth-sessions-change-in-production")
+    
+    # Access tokens issued at login (Authorization: Bearer ...); signed with the session key unless set.
+    # Never with a built-in or example value: without a real secret, tokens are refused instead
+    ACCESS_TOKEN_SECRET = next(
+        (secret for secret in (os.getenv("ACCESS_TOKEN_SECRET"), os.getenv("SESSION_SECRET_KEY"))
+         if secret and secret not in PLACEHOLDER_SECRETS),
+        None
+    )
+    ACCESS_TOKEN_TTL_SECONDS = int(os.getenv("ACCESS_TOKEN_TTL_SECONDS", str(12 * 3600)))
+    ACCESS_TOKEN_CACHE_ENTRIES = int(os.getenv("ACCESS_TOKEN_CACHE_ENTRIES", "4096"))  # verified tokens kept per worker
 
 settings = Settings()
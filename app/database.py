@@ -1,6 +1,10 @@
+import time
+from sqlalchemy import event, exc
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
+from app.services.metrics import db_connection_acquire
 
 # Use settings.DATABASE_URL loaded from config.py
 DATABASE_URL = settings.DATABASE_URL
@@ -12,7 +16,95 @@ if not DATABASE_URL:
 if DATABASE_URL.startswith("postgresql://"):
     DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+
+class PoolMetrics:
+    """Checkout counters shared by every pool the engine creates (dispose() replaces the pool)."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.invalidated = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.last_wait_ms = 0.0
+
+
+pool_metrics = PoolMetrics()
+
+
+class ObservedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that times each checkout: waiting for a free slot, connecting and pre-ping."""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            pool_metrics.timeouts += 1
+            raise
+        except Exception:
+            pool_metrics.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            elapsed_ms = elapsed * 1000
+            db_connection_acquire.observe(elapsed)
+            pool_metrics.checkouts += 1
+            pool_metrics.total_wait_ms += elapsed_ms
+            pool_metrics.last_wait_ms = elapsed_ms
+            pool_metrics.max_wait_ms = max(pool_metrics.max_wait_ms, elapsed_ms)
+
+
+engine_options = {"echo": False}
+if DATABASE_URL.startswith("postgresql+asyncpg://"):
+    engine_options.update(
+        poolclass=ObservedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            # SQLAlchemy's per-connection cache of prepared statements, and asyncpg's own;
+            # set both to 0 behind a transaction-mode pooler such as PgBouncer
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+
+engine = create_async_engine(DATABASE_URL, **engine_options)
+
+
+@event.listens_for(engine.sync_engine, "invalidate")
+def count_invalidated(dbapi_connection, connection_record, exception):
+    # Stale connections caught by pre-ping or dropped mid-query
+    pool_metrics.invalidated += 1
+
+
+def pool_stats() -> dict:
+    pool = engine.pool
+    checkouts = pool_metrics.checkouts
+    stats = {
+        "pool": type(pool).__name__,
+        "checkouts": checkouts,
+        "timeouts": pool_metrics.timeouts,
+        "errors": pool_metrics.errors,
+        "invalidated": pool_metrics.invalidated,
+        "avg_wait_ms": round(pool_metrics.total_wait_ms / checkouts, 2) if checkouts else 0.0,
+        "max_wait_ms": round(pool_metrics.max_wait_ms, 2),
+        "last_wait_ms": round(pool_metrics.last_wait_ms, 2),
+    }
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    return stats
+
 
 async_session = sessionmaker(
     bind=engine,
@@ -1,14 +1,21 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from starlette.middleware.sessions import SessionMiddleware
 from app.routes import users, ai_agent, protected, files
 from app.auth import routes as auth_routes
 from app.models.user import Base
-from app.database import engine
+from app.database import engine, pool_stats
+from app.responses import CompressionMiddleware
+from app.services.chat_history import chat_history_writer
+from app.services.extraction import pdf_extractor
+from app.services.jobs import extraction_jobs
+from app.services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, event_loop_monitor, registry
+from app.services.static_assets import StaticAssetCache
+from app.services.warmup import warm_up
 from app.config import settings
-import os
+import asyncio
+from pathlib import Path
 
 
 app = FastAPI(
@@ -46,11 +53,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip for JSON and text responses above the size threshold
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_BYTES,
+    compresslevel=settings.COMPRESSION_LEVEL,
+)
+
+# Outermost, so request latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
+
+# Startup work moved off the critical path in fast-start mode
+background_startup = set()
+
 # Run this when app starts
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if not settings.FAST_START:
+        # Convenient for development; deployments apply migrations with `alembic upgrade head`
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    chat_history_writer.start()
+    # Picks up extraction jobs left unfinished by a previous run
+    if settings.FAST_START:
+        task = asyncio.create_task(extraction_jobs.start())
+        background_startup.add(task)
+        task.add_done_callback(background_startup.discard)
+    else:
+        await extraction_jobs.start()
+    warm_up.start()
+    event_loop_monitor.start()
+    if spa_assets is not None:
+        # Maximum-level gzip/brotli of the bundle takes a moment; serve it uncompressed meanwhile
+        task = asyncio.create_task(asyncio.to_thread(spa_assets.compress))
+        background_startup.add(task)
+        task.add_done_callback(background_startup.discard)
+
+# Flush queued chat history before the worker exits
+@app.on_event("shutdown")
+async def shutdown():
+    await warm_up.stop()
+    await event_loop_monitor.stop()
+    for task in background_startup:
+        task.cancel()
+    await asyncio.gather(*background_startup, return_exceptions=True)
+    await extraction_jobs.stop()
+    await chat_history_writer.stop()
+    pdf_extractor.shutdown()
 
 # Route registration
 app.include_router(auth_routes.router, prefix="/api/auth", tags=["Auth"])
@@ -59,32 +108,44 @@ app.include_router(ai_agent.router, prefix="/api", tags=["AI Agent"])
 app.include_router(protected.router, prefix="/api", tags=["Protected"])
 app.include_router(files.router, prefix="/api", tags=["Files"])
 
-# Serve frontend static files (for production)
-frontend_dist = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend", "dist")
-if os.path.exists(frontend_dist):
-    # Serve static assets (JS, CSS, images)
-    assets_dir = os.path.join(frontend_dist, "assets")
-    if os.path.exists(assets_dir):
-        app.mount("/assets", StaticFiles(directory=assets_dir), name="assets")
-    
+@app.get("/api/db/pool", tags=["Health"])
+async def db_pool_status():
+    """Connection pool occupancy and checkout wait times for this worker."""
+    return pool_stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint for this worker."""
+    return PlainTextResponse(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+# Serve frontend static files (for production), held in memory with precompressed variants
+frontend_dist = Path(__file__).resolve().parent.parent / "frontend" / "dist"
+spa_assets = StaticAssetCache(frontend_dist) if frontend_dist.is_dir() else None
+if spa_assets is not None:
+    spa_assets.load()
+
+    @app.get("/api/static/status", tags=["Health"])
+    async def static_assets_status():
+        """Files and bytes held by this worker's in-memory frontend bundle."""
+        return spa_assets.stats()
+
     # Serve index.html for all non-API routes (SPA routing)
     @app.get("/")
-    async def serve_root():
-        index_path = os.path.join(frontend_dist, "index.html")
-        return FileResponse(index_path)
-    
+    async def serve_root(request: Request):
+        return spa_assets.response(spa_assets.get("index.html"), request.headers)
+
     @app.get("/{full_path:path}")
-    async def serve_spa(full_path: str):
+    async def serve_spa(full_path: str, request: Request):
         # Don't interfere with API routes
         if full_path.startswith("api") or full_path.startswith("docs") or full_path.startswith("openapi"):
-            from fastapi.responses import JSONResponse
             return JSONResponse({"detail": "Not Found"}, status_code=404)
-        
-        # Try to serve the exact file first (for favicon, etc.)
-        file_path = os.path.join(frontend_dist, full_path)
-        if os.path.exists(file_path) and os.path.isfile(file_path):
-            return FileResponse(file_path)
-        
-        # Otherwise serve index.html for SPA routing
-        index_path = os.path.join(frontend_dist, "index.html")
-        return FileResponse(index_path)
+
+        # Try to serve the exact file first (assets, favicon, etc.)
+        asset = spa_assets.get(full_path)
+        if asset is None:
+            if full_path.startswith("assets/"):
+                # A missing chunk must not come back as HTML
+                return JSONResponse({"detail": "Not Found"}, status_code=404)
+            # Otherwise serve index.html for SPA routing
+            asset = spa_assets.get("index.html")
+        return spa_assets.response(asset, request.headers)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from app.models.user import Base
+
+class ChatMessage(Base):
+    __tablename__ = "chat_messages"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    subject = Column(String, nullable=False)
+    message = Column(Text, nullable=False)
+    response = Column(Text, nullable=False)
+    source = Column(String, nullable=False)  # gemini, cache or fallback
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+    # Serves "latest chats for a user" keyset pages: WHERE user_id = ? AND id < ? ORDER BY id DESC
+    __table_args__ = (Index("ix_chat_messages_user_id_id", "user_id", "id"),)
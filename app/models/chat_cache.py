@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, Text, DateTime
+from app.models.user import Base
+
+class ChatCacheEntry(Base):
+    __tablename__ = "chat_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 of the normalized request
+    subject = Column(String, nullable=False)
+    response = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
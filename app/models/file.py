@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime
+from app.models.user import Base
+
+class UploadedFile(Base):
+    __tablename__ = "uploaded_files"
+
+    id = Column(String(36), primary_key=True)  # Upload id returned to clients
+    owner_id = Column(Integer, index=True, nullable=True)
+    filename = Column(String, nullable=False)  # Original name as uploaded
+    content_type = Column(String, nullable=True)
+    size = Column(BigInteger, nullable=False)
+    sha256 = Column(String(64), index=True, nullable=False)
+    storage_path = Column(String, nullable=False)  # Hard link to the content-addressed blob
+    text_path = Column(String, nullable=True)  # Where the extracted text is kept, if any
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+    # Extraction job state: pending -> processing -> done | failed
+    status = Column(String(16), index=True, nullable=False, default="done")
+    error = Column(Text, nullable=True)
+    page_count = Column(Integer, nullable=True)
+    pages_read = Column(Integer, nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,79 @@
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# File downloads are served byte-exact: ranges, strong ETags and sendfile all depend on it
+UNCOMPRESSED_PATH_SUFFIXES = ("/download",)
+# Event streams must reach the client chunk by chunk; the rest are already compressed.
+# Entries ending in "/" match the whole top-level type.
+UNCOMPRESSED_CONTENT_TYPES = (
+    "text/event-stream",
+    "application/pdf",
+    "application/octet-stream",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "image/",
+    "audio/",
+    "video/",
+    "font/woff",
+    "font/woff2",
+)
+
+
+def compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    media_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    return not any(
+        media_type.startswith(excluded) if excluded.endswith("/") else media_type == excluded
+        for excluded in UNCOMPRESSED_CONTENT_TYPES
+    )
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON rendered by orjson: compact UTF-8 output, several times faster than json.dumps on
+    the long markdown strings in chat replies and upload previews (see bench_responses.py)."""
+
+    def render(self, content: Any) -> bytes:
+        # numpy values can come back from the retrieval scorer
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+class CompressionMiddleware:
+    """gzip for responses of at least `minimum_size` bytes when the client accepts it.
+
+    Starlette's GZipMiddleware does the negotiation and encoding. Which responses skip it is
+    decided here from the response headers rather than by GZipMiddleware's own exclusion
+    options, which older Starlette releases lack: responses that already carry a
+    Content-Encoding (the precompressed SPA bundle), event streams and already-compressed
+    types go straight to the client, and file downloads bypass it entirely.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int, compresslevel: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].endswith(UNCOMPRESSED_PATH_SUFFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        async def routed_app(scope: Scope, receive: Receive, gzip_send: Send):
+            target = gzip_send
+
+            async def route(message: Message):
+                nonlocal target
+                if message["type"] == "http.response.start" and not compressible(Headers(raw=message["headers"])):
+                    target = send
+                await target(message)
+
+            await self.app(scope, receive, route)
+
+        # Built per request so the router can reach this request's untouched send
+        gzip = GZipMiddleware(routed_app, minimum_size=self.minimum_size, compresslevel=self.compresslevel)
+        await gzip(scope, receive, send)
@@ -1,23 +1,67 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
-import os
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 import uuid
+import datetime
 from pathlib import Path
-import PyPDF2
-import io
-from typing import List
+import asyncio
+from typing import List, Optional, Tuple
+from app.auth.tokens import TokenUser, get_current_user, get_optional_user
+from app.config import settings
+from app.database import get_db
+from app.models.file import UploadedFile
+from app.services.downloads import file_download
+from app.services.extraction import pdf_extractor
+from app.services.jobs import extraction_jobs
+from app.services.retrieval import document_indexes
+from app.services.storage import UPLOAD_DIR, content_store
+from app.services.uploads import UploadTooLarge, extract_upload, visible_to, read_stored_pages, read_stored_range, read_stored_text, stream_to_disk
+from app.responses import FastJSONResponse
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
-# Create uploads directory if it doesn't exist
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
+def file_metadata(record: UploadedFile) -> dict:
+    return {
+        "id": record.id,
+        "filename": record.filename,
+        "type": record.content_type,
+        "size": record.size,
+        "sha256": record.sha256,
+        "owner_id": record.owner_id,
+        "status": record.status,
+        "text_available": record.status == "done" and record.text_path is not None,
+        "created_at": record.created_at.isoformat()
+    }
+
+async def get_file_or_404(db: AsyncSession, file_id: str, user: Optional[TokenUser]) -> UploadedFile:
+    """Primary-key lookup of an upload's metadata, as seen by `user`.
+
+    Files uploaded while signed in belong to that user and look missing to everyone else;
+    anonymous uploads are reachable by their (unguessable) id alone.
+    """
+    record = await db.get(UploadedFile, file_id)
+    if record is None or not visible_to(record, user):
+        raise HTTPException(status_code=404, detail="File not found")
+    return record
+
+def discard_uploads(linked: List[Tuple[str, str, Path]]):
+    """Undo the stored links (and, for their last reference, the blobs and text) and indexes of uploads that never got a row."""
+    for file_id, sha256, file_path in linked:
+        content_store.remove_reference(sha256, file_path)
+        document_indexes.remove(file_id)
 
 @router.post("/files/upload")
-async def upload_files(files: List[UploadFile] = File(...)):
+async def upload_files(
+    files: List[UploadFile] = File(...),
+    background: bool = Query(False, description="Return right away with status 'pending' and extract in the background"),
+    user: Optional[TokenUser] = Depends(get_optional_user),
+    db: AsyncSession = Depends(get_db)
+):
     """Upload and process files (PDFs, text files, images)."""
     
     processed_files = []
+    # Everything linked into the content store by this request, undone if the request fails
+    linked: List[Tuple[str, str, Path]] = []
     
     for file in files:
         try:
@@ -27,88 +71,269 @@ async def upload_files(files: List[UploadFile] = File(...)):
             unique_filename = f"{file_id}{file_extension}"
             file_path = UPLOAD_DIR / unique_filename
             
-            # Save file
-            content = await file.read()
-            with open(file_path, "wb") as f:
-                f.write(content)
+            # Stream to disk in chunks, hashing as we go; nothing holds the whole file in memory
+            temp_path = content_store.temp_path()
+            saved = await stream_to_disk(file, temp_path, settings.MAX_FILE_SIZE)
             
-            # Process file based on type
-            processed_content = ""
-            file_type = file.content_type
-            
-            if file_type == "application/pdf":
-                # Extract text from PDF
-                try:
-                    pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-                    text_content = []
-                    for page in pdf_reader.pages:
-                        text_content.append(page.extract_text())
-                    processed_content = "\n".join(text_content)
-                except Exception as e:
-                    processed_content = f"PDF processing failed: {str(e)}"
-                    
-            elif file_type.startswith("text/") or file_extension in [".txt", ".md", ".py", ".js", ".json"]:
-                # Handle text files
-                try:
-                    processed_content = content.decode('utf-8')
-                except UnicodeDecodeError:
-                    processed_content = content.decode('latin-1')
-                    
-            elif file_type.startswith("image/"):
-                # For images, we'll just note that it's an image
-                # In a real implementation, you might use OCR or image analysis
-                processed_content = f"Image file: {file.filename} ({len(content)} bytes)"
-                
-            else:
-                processed_content = f"File type {file_type} - content extraction not supported"
+            # Keep one copy per distinct content and link this upload id to it
+            stored_new = content_store.commit(temp_path, saved.sha256)
+            linked.append((file_id, saved.sha256, file_path))
+            content_store.add_reference(saved.sha256, file_path)
             
-            processed_files.append({
+            now = datetime.datetime.now(datetime.timezone.utc)
+            record = UploadedFile(
+                id=file_id,
+                owner_id=user.id if user is not None else None,
+                filename=file.filename,
+                content_type=file.content_type,
+                size=saved.size,
+                sha256=saved.sha256,
+                storage_path=str(file_path),
+                created_at=now,
+                updated_at=now,
+                status="pending"
+            )
+            file_info = {
                 "id": file_id,
                 "filename": file.filename,
-                "size": len(content),
-                "type": file_type,
-                "content": processed_content[:5000],  # Limit content length
+                "size": saved.size,
+                "sha256": saved.sha256,
+                "deduplicated": not stored_new,
+                "type": file.content_type,
                 "file_path": str(file_path)
-            })
+            }
             
+            if not background:
+                # Process file based on type, reading back from disk off the event loop
+                extracted = await extract_upload(file_id, file_path, saved.sha256, file.content_type, file.filename, saved.size)
+                record.status = "failed" if extracted.error else "done"
+                record.error = extracted.error
+                record.text_path = str(extracted.text_path) if extracted.text_path else None
+                record.page_count = extracted.page_count
+                record.pages_read = extracted.pages_read
+                
+                file_info.update({
+                    "content": extracted.content[:5000],  # Limit content length; the rest is at /files/{id}/text
+                    "chunks": extracted.chunks
+                })
+                if extracted.page_count is not None:
+                    file_info.update({
+                        "pages": extracted.page_count,
+                        "pages_read": extracted.pages_read,
+                        "truncated": extracted.truncated,
+                        "extraction_cached": extracted.cached
+                    })
+            
+            file_info["status"] = record.status
+            db.add(record)
+            processed_files.append(file_info)
+            
+        except UploadTooLarge as e:
+            discard_uploads(linked)
+            raise HTTPException(status_code=413, detail=f"Error processing file {file.filename}: {str(e)}")
         except Exception as e:
+            discard_uploads(linked)
             raise HTTPException(status_code=500, detail=f"Error processing file {file.filename}: {str(e)}")
     
-    return JSONResponse({
+    try:
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        discard_uploads(linked)
+        raise HTTPException(status_code=500, detail=f"Error saving uploads: {str(e)}")
+    
+    # Queue only after the rows are committed, so workers can always find them
+    if background:
+        for file_info in processed_files:
+            extraction_jobs.submit(file_info["id"])
+    
+    return FastJSONResponse({
         "success": True,
         "files": processed_files,
-        "message": f"Successfully processed {len(processed_files)} file(s)"
+        "message": f"Successfully processed {len(processed_files)} file(s)" if not background
+        else f"Accepted {len(processed_files)} file(s) for processing"
+    })
+
+@router.get("/files")
+async def list_files(
+    limit: int = Query(50, ge=1, le=200),
+    user: TokenUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """List the signed-in user's uploads, newest first."""
+    
+    result = await db.execute(
+        select(UploadedFile)
+        .where(UploadedFile.owner_id == user.id)
+        .order_by(UploadedFile.created_at.desc())
+        .limit(limit)
+    )
+    return FastJSONResponse({
+        "files": [file_metadata(record) for record in result.scalars()]
     })
 
 @router.delete("/files/{file_id}")
-async def delete_file(file_id: str):
+async def delete_file(file_id: str, user: Optional[TokenUser] = Depends(get_optional_user), db: AsyncSession = Depends(get_db)):
     """Delete an uploaded file."""
     
-    # Find and delete the file
-    for file_path in UPLOAD_DIR.glob(f"{file_id}.*"):
-        try:
-            file_path.unlink()
-            return JSONResponse({
-                "success": True,
-                "message": f"File {file_id} deleted successfully"
-            })
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error deleting file: {str(e)}")
-    
-    raise HTTPException(status_code=404, detail="File not found")
+    record = await get_file_or_404(db, file_id, user)
+    try:
+        content_store.remove_reference(record.sha256, Path(record.storage_path))
+        document_indexes.remove(file_id)
+        await db.delete(record)
+        await db.commit()
+        return FastJSONResponse({
+            "success": True,
+            "message": f"File {file_id} deleted successfully"
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting file: {str(e)}")
 
 @router.get("/files/{file_id}")
-async def get_file_info(file_id: str):
+async def get_file_info(file_id: str, user: Optional[TokenUser] = Depends(get_optional_user), db: AsyncSession = Depends(get_db)):
     """Get information about an uploaded file."""
     
-    # This would typically query a database
-    # For now, we'll return basic info if file exists
-    for file_path in UPLOAD_DIR.glob(f"{file_id}.*"):
-        return JSONResponse({
-            "id": file_id,
-            "exists": True,
-            "path": str(file_path),
-            "size": file_path.stat().st_size
-        })
+    record = await get_file_or_404(db, file_id, user)
+    return FastJSONResponse({
+        **file_metadata(record),
+        "exists": True,
+        "path": record.storage_path
+    })
+
+@router.api_route("/files/{file_id}/download", methods=["GET", "HEAD"])
+async def download_file(
+    file_id: str,
+    request: Request,
+    inline: bool = Query(False, description="Display in the browser (PDF, images, plain text only) instead of saving"),
+    user: Optional[TokenUser] = Depends(get_optional_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Download an uploaded file, with Range, ETag and conditional request support."""
+    
+    record = await get_file_or_404(db, file_id, user)
+    try:
+        return file_download(
+            Path(record.storage_path),
+            sha256=record.sha256,
+            filename=record.filename,
+            media_type=record.content_type or "application/octet-stream",
+            last_modified=record.created_at,
+            request_headers=request.headers,
+            method=request.method,
+            inline=inline
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File content not found")
+
+@router.get("/files/{file_id}/pages")
+async def get_file_pages(
+    file_id: str,
+    start: int = Query(1, ge=1, description="First page to extract (1-based)"),
+    end: Optional[int] = Query(None, ge=1, description="Last page to extract, inclusive; defaults to the last page"),
+    max_chars: Optional[int] = Query(None, ge=1),
+    user: Optional[TokenUser] = Depends(get_optional_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the text of a page range of an uploaded PDF."""
+    
+    if end is not None and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    
+    record = await get_file_or_404(db, file_id, user)
+    if record.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail="File is not a PDF")
+    
+    # Pages already extracted at upload time come from the text store; others are extracted now
+    if record.text_path and record.page_count is not None:
+        last = min(end or record.page_count, record.page_count)
+        if start <= last <= (record.pages_read or 0):
+            try:
+                content = await asyncio.to_thread(read_stored_pages, Path(record.text_path), start, last)
+            except (FileNotFoundError, ValueError):
+                content = None
+            if content is not None:
+                truncated = max_chars is not None and len(content) > max_chars
+                return FastJSONResponse({
+                    "id": file_id,
+                    "start": start,
+                    "end": last,
+                    "pages": record.page_count,
+                    "truncated": truncated,
+                    "stored": True,
+                    "content": content[:max_chars] if max_chars is not None else content
+                })
+    
+    try:
+        extraction = await pdf_extractor.extract(Path(record.storage_path), max_chars=max_chars, first_page=start, last_page=end)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"PDF processing failed: {str(e)}")
+    
+    return FastJSONResponse({
+        "id": file_id,
+        "start": start,
+        "end": start + extraction.pages_read - 1,
+        "pages": extraction.page_count,
+        "truncated": extraction.truncated,
+        "stored": False,
+        "content": extraction.text
+    })
+
+@router.get("/files/{file_id}/text")
+async def get_file_text(
+    file_id: str,
+    start: int = Query(0, ge=0, description="First character (0-based)"),
+    end: Optional[int] = Query(None, ge=0, description="End character, exclusive; defaults to start + limit"),
+    limit: int = Query(20000, ge=1, le=200000, description="Maximum characters to return"),
+    user: Optional[TokenUser] = Depends(get_optional_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a character range of an upload's extracted text.
+
+    For PDFs the stored text covers the pages read within PDF_EXTRACT_MAX_CHARS; `truncated`
+    says whether pages beyond `pages_read` are missing (see /files/{id}/pages for those).
+    """
+    
+    if end is not None and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    
+    record = await get_file_or_404(db, file_id, user)
+    if record.status != "done" or record.text_path is None:
+        raise HTTPException(status_code=404, detail="Extracted text not available")
+    
+    stop = start + limit if end is None else min(end, start + limit)
+    try:
+        content, total_chars = await asyncio.to_thread(read_stored_range, Path(record.text_path), start, stop)
+    except (FileNotFoundError, ValueError):
+        raise HTTPException(status_code=404, detail="Extracted text not available")
     
-    raise HTTPException(status_code=404, detail="File not found")
+    return FastJSONResponse({
+        "id": file_id,
+        "start": start,
+        "end": start + len(content),
+        "total_chars": total_chars,
+        "pages": record.page_count,
+        "pages_read": record.pages_read,
+        "truncated": record.page_count is not None and (record.pages_read or 0) < record.page_count,
+        "content": content
+    })
+
+@router.get("/files/{file_id}/status")
+async def get_file_status(file_id: str, include_content: bool = False, user: Optional[TokenUser] = Depends(get_optional_user), db: AsyncSession = Depends(get_db)):
+    """Report extraction progress for an upload."""
+    
+    record = await get_file_or_404(db, file_id, user)
+    status = {
+        "id": record.id,
+        "status": record.status,
+        "error": record.error,
+        "pages": record.page_count,
+        "pages_read": record.pages_read,
+        "text_available": record.status == "done" and record.text_path is not None,
+        "updated_at": record.updated_at.isoformat() if record.updated_at else None
+    }
+    if include_content and status["text_available"]:
+        try:
+            status["content"] = await asyncio.to_thread(read_stored_text, Path(record.text_path), 0, 5000)
+        except (FileNotFoundError, ValueError):
+            status["text_available"] = False
+    return FastJSONResponse(status)
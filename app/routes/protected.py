@@ -1,29 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.auth.tokens import TokenUser, get_current_user
 from app.database import get_db
+from app.services.chat_history import get_recent_chats
+from app.responses import FastJSONResponse
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 @router.get("/protected/dashboard")
-async def get_dashboard_data(db: AsyncSession = Depends(get_db)):
+async def get_dashboard_data(
+    user: TokenUser = Depends(get_current_user),
+    before: Optional[int] = Query(None, description="Return chats older than this chat id (next_before from the previous page)"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
     """Get protected dashboard data for authenticated users."""
+    recent_chats = await get_recent_chats(db, user.id, before_id=before, limit=limit)
+    
     return {
         "message": "Welcome to your dashboard!",
         "data": {
-            "recent_chats": [],
+            "recent_chats": recent_chats,
+            "next_before": recent_chats[-1]["id"] if len(recent_chats) == limit else None,
             "study_progress": 0,
             "recommendations": []
         }
     }
 
 @router.get("/protected/profile")
-async def get_user_profile(db: AsyncSession = Depends(get_db)):
+async def get_user_profile(user: TokenUser = Depends(get_current_user)):
     """Get user profile information."""
+    # Identity comes from the verified token; no database round trip
     return {
         "message": "User profile endpoint",
         "profile": {
-            "name": "User",
-            "email": "user@example.com",
+            "id": user.id,
+            "name": user.name,
+            "email": user.email,
             "preferences": {}
         }
     }
\ No newline at end of file
@@ -1,44 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Header, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 from sqlalchemy.exc import IntegrityError
-import bcrypt
-import re
+import secrets
+from typing import Optional
+from app.auth.tokens import access_tokens, issue_access_token
+from app.config import settings
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserOut, UserLogin
+from app.services.passwords import PASSWORD_REQUIREMENTS, PasswordHasherSaturated, password_hasher, validate_password
+from app.services.user_cache import user_cache
+from app.services.user_import import ImportFormatError, detect_format, import_users
+from app.responses import FastJSONResponse
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
-# Password hashing using bcrypt directly
-def hash_password(password: str) -> str:
-    # Truncate to 72 bytes (bcrypt limitation)
-    password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password_bytes, salt).decode('utf-8')
+def hashing_unavailable(error: PasswordHasherSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in attempts right now. Please try again shortly.",
+        headers={"Retry-After": str(error.retry_after)}
+    )
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    password_bytes = plain_password.encode('utf-8')[:72]
-    hashed_bytes = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(password_bytes, hashed_bytes)
+# Password hashing using bcrypt on a bounded worker pool (see app/services/passwords.py)
+async def hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherSaturated as e:
+        raise hashing_unavailable(e)
 
-def validate_password(password: str) -> bool:
-    """
-    Validate password requirements:
-    - At least 8 characters long
-    - At least one uppercase letter
-    - At least one number
-    - At least one special character
-    """
-    if len(password) < 8:
-        return False
-    if not re.search(r"[A-Z]", password):
-        return False
-    if not re.search(r"\d", password):
-        return False
-    if not re.search(r"[!@#$%^&*()_+\-=\[\]{};':\"\\|,.<>\/?]", password):
-        return False
-    return True
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except PasswordHasherSaturated as e:
+        raise hashing_unavailable(e)
 
 @router.post("/signup", response_model=UserOut)
 async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
@@ -47,12 +42,11 @@ async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
         if not validate_password(user_data.password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Password must be at least 8 characters long and contain at least one uppercase letter, one number, and one special character"
+                detail=PASSWORD_REQUIREMENTS
             )
         
         # Check if user already exists
-        result = await db.execute(select(User).where(User.email == user_data.email))
-        existing_user = result.scalar_one_or_none()
+        existing_user = await user_cache.get_by_email(db, user_data.email)
         
         if existing_user:
             raise HTTPException(
@@ -61,7 +55,7 @@ async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
             )
         
         # Create new user with hashed password
-        hashed_password = hash_password(user_data.password)
+        hashed_password = await hash_password(user_data.password)
         new_user = User(
             name=user_data.name,
             email=user_data.email,
@@ -71,11 +65,15 @@ async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
         db.add(new_user)
         await db.commit()
         await db.refresh(new_user)
+        # Replaces the negative entry left by the existence check above
+        user_cache.put(new_user)
         
         return new_user
         
     except IntegrityError:
         await db.rollback()
+        # Lost a race with another signup: drop the negative entry from the existence check
+        user_cache.invalidate(email=user_data.email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -93,8 +91,7 @@ async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
 @router.post("/login")
 async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
     # Find user by email
-    result = await db.execute(select(User).where(User.email == user_data.email))
-    user = result.scalar_one_or_none()
+    user = await user_cache.get_by_email(db, user_data.email)
     
     # Check if user exists first
     if not user:
@@ -104,7 +101,7 @@ async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
         )
     
     # Then verify password
-    if not verify_password(user_data.password, user.password):
+    if not await verify_password(user_data.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid password"
@@ -116,5 +113,47 @@ async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
             "id": user.id,
             "name": user.name,
             "email": user.email
-        }
+        },
+        **issue_access_token(user)
+    }
+
+@router.get("/password-hashing/status")
+async def password_hashing_status():
+    """Worker pool load and timings for bcrypt hashing, plus access token verification."""
+    return {
+        **password_hasher.stats(),
+        "access_tokens": access_tokens.stats()
     }
+
+@router.post("/users/import")
+async def bulk_import_users(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv or jsonl; detected from the file name when omitted"),
+    x_import_token: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create many accounts from a CSV or JSONL file, with a per-row result report."""
+    if not settings.USER_IMPORT_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User import is disabled")
+    if not x_import_token or not secrets.compare_digest(x_import_token, settings.USER_IMPORT_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid import token")
+    
+    data = await file.read(settings.MAX_FILE_SIZE + 1)
+    if len(data) > settings.MAX_FILE_SIZE:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Import file is too large")
+    
+    try:
+        report = await import_users(db, data, detect_format(file.filename, format))
+    except ImportFormatError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    # New accounts may be cached here as unknown emails
+    for row in report["rows"]:
+        if row["status"] == "created":
+            user_cache.invalidate(email=row["email"])
+    return report
+
+@router.get("/users/cache/status")
+async def user_cache_status():
+    """Hit ratio and size of this worker's user lookup cache."""
+    return user_cache.stats()
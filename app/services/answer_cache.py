@@ -0,0 +1,155 @@
+import asyncio
+import datetime
+import hashlib
+import re
+import time
+from typing import Optional
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from app.config import settings
+from app.database import async_session
+from app.models.chat_cache import ChatCacheEntry
+from app.services.lru import LRUCache
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase and collapse whitespace so trivially different phrasings share a key."""
+    return re.sub(r"\s+", " ", message).strip().lower()
+
+
+def make_cache_key(message: str, subject: str, file_content: Optional[str] = None) -> str:
+    """Hash the normalized (subject, message, file content) triple into a cache key."""
+    file_hash = hashlib.sha256(file_content.encode("utf-8")).hexdigest() if file_content else ""
+    raw = "\x1f".join([subject.strip().lower(), normalize_message(message), file_hash])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """Two-tier cache of AI answers: process-local LRU first, then the shared chat_cache table.
+
+    Expired rows are never read but would stay in the table forever, so a write deletes them
+    (up to `PURGE_BATCH_ROWS` at a time) once every `purge_interval_seconds`.
+    """
+
+    PURGE_BATCH_ROWS = 5000
+
+    def __init__(self, max_entries: int, ttl_seconds: int, db_enabled: bool = True,
+                 purge_interval_seconds: int = 600):
+        self.ttl_seconds = ttl_seconds
+        self.db_enabled = db_enabled
+        self.purge_interval_seconds = purge_interval_seconds
+        self._next_purge = 0.0
+        self.memory = LRUCache(max_entries, ttl_seconds)
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.db_errors = 0
+        self.purged = 0
+        # Keep references to background writes so they aren't garbage collected mid-flight
+        self._pending_writes = set()
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+
+        if self.db_enabled:
+            try:
+                value, remaining = await self._db_get(key)
+            except Exception as e:
+                self.db_errors += 1
+                print(f"Answer cache read error: {str(e)}")
+                value = None
+            if value is not None:
+                self.db_hits += 1
+                # Promote into this worker's memory tier for the rest of its lifetime
+                self.memory.set(key, value, ttl_seconds=remaining)
+                return value
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, subject: str, value: str):
+        """Store an answer in memory now and in Postgres in the background."""
+        self.stores += 1
+        self.memory.set(key, value)
+        if self.db_enabled:
+            task = asyncio.create_task(self._db_set(key, subject, value))
+            self._pending_writes.add(task)
+            task.add_done_callback(self._pending_writes.discard)
+
+    async def _db_get(self, key: str):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        async with async_session() as session:
+            result = await session.execute(
+                select(ChatCacheEntry.response, ChatCacheEntry.expires_at).where(
+                    ChatCacheEntry.key == key,
+                    ChatCacheEntry.expires_at > now
+                )
+            )
+            row = result.first()
+        if row is None:
+            return None, 0
+        return row.response, int((row.expires_at - now).total_seconds())
+
+    async def _db_set(self, key: str, subject: str, value: str):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        expires_at = now + datetime.timedelta(seconds=self.ttl_seconds)
+        statement = insert(ChatCacheEntry).values(
+            key=key, subject=subject, response=value, created_at=now, expires_at=expires_at
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[ChatCacheEntry.key],
+            set_={"response": value, "created_at": now, "expires_at": expires_at}
+        )
+        try:
+            async with async_session() as session:
+                await session.execute(statement)
+                await session.commit()
+        except Exception as e:
+            self.db_errors += 1
+            print(f"Answer cache write error: {str(e)}")
+            return
+        if time.monotonic() >= self._next_purge:
+            self._next_purge = time.monotonic() + self.purge_interval_seconds
+            await self._purge_expired(now)
+
+    async def _purge_expired(self, now: datetime.datetime):
+        # Bounded so a large backlog is cleared over several purges rather than one long delete
+        expired = (
+            select(ChatCacheEntry.key)
+            .where(ChatCacheEntry.expires_at <= now)
+            .limit(self.PURGE_BATCH_ROWS)
+            .scalar_subquery()
+        )
+        try:
+            async with async_session() as session:
+                result = await session.execute(delete(ChatCacheEntry).where(ChatCacheEntry.key.in_(expired)))
+                await session.commit()
+            self.purged += result.rowcount
+        except Exception as e:
+            self.db_errors += 1
+            print(f"Answer cache purge error: {str(e)}")
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "memory_entries": len(self.memory),
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "db_errors": self.db_errors,
+            "purged": self.purged,
+            "hit_ratio": round((self.memory_hits + self.db_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+
+answer_cache = AnswerCache(
+    max_entries=settings.CHAT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.CHAT_CACHE_TTL_SECONDS,
+    db_enabled=settings.CHAT_CACHE_DB_ENABLED,
+    purge_interval_seconds=settings.CHAT_CACHE_PURGE_INTERVAL_SECONDS,
+)
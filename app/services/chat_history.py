@@ -0,0 +1,141 @@
+import asyncio
+import datetime
+from typing import List, Optional
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import async_session
+from app.models.chat import ChatMessage
+
+
+class ChatHistoryWriter:
+    """Write-behind queue for chat turns.
+
+    Request handlers only enqueue; a background task drains the queue and inserts rows in
+    batches of up to `batch_size`, waiting at most `flush_seconds` to fill a batch. When the
+    queue is full new turns are dropped (and counted) rather than slowing the chat response.
+    """
+
+    def __init__(self, batch_size: int, flush_seconds: float, max_queue: int):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        # Rows taken off the queue for the batch being filled or written; kept here rather than
+        # in a local so stop() can still flush them if the task is cancelled mid-batch
+        self._batch: List[dict] = []
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+
+    def record(self, user_id: int, subject: str, message: str, response: str, source: str):
+        row = {
+            "user_id": user_id,
+            "subject": subject,
+            "message": message,
+            "response": response,
+            "source": source,
+            "created_at": datetime.datetime.now(datetime.timezone.utc),
+        }
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and flush whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        rows, self._batch = self._batch, []
+        while not self._queue.empty():
+            rows.append(self._queue.get_nowait())
+        for start in range(0, len(rows), self.batch_size):
+            await self._write(rows[start:start + self.batch_size])
+
+    async def _fill_batch(self):
+        batch = self._batch
+        batch.append(await self._queue.get())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self):
+        while True:
+            await self._fill_batch()
+            # If cancelled while writing, the rows stay in self._batch for stop() to flush
+            await self._write(self._batch)
+            self._batch = []
+
+    async def _write(self, rows: List[dict]):
+        if not rows:
+            return
+        try:
+            async with async_session() as session:
+                await session.execute(insert(ChatMessage), rows)
+                await session.commit()
+            self.written += len(rows)
+            self.batches += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"Chat history write error ({len(rows)} rows lost): {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+
+async def get_recent_chats(db: AsyncSession, user_id: int, before_id: Optional[int] = None, limit: int = 20) -> List[dict]:
+    """One keyset page of a user's chats, newest first; pass the last id seen as `before_id`."""
+    query = select(
+        ChatMessage.id,
+        ChatMessage.subject,
+        ChatMessage.message,
+        func.substr(ChatMessage.response, 1, 300).label("response_preview"),
+        ChatMessage.source,
+        ChatMessage.created_at,
+    ).where(ChatMessage.user_id == user_id)
+    if before_id is not None:
+        query = query.where(ChatMessage.id < before_id)
+    query = query.order_by(ChatMessage.id.desc()).limit(limit)
+
+    result = await db.execute(query)
+    return [
+        {
+            "id": row.id,
+            "subject": row.subject,
+            "message": row.message,
+            "response_preview": row.response_preview,
+            "source": row.source,
+            "timestamp": row.created_at.isoformat(),
+        }
+        for row in result
+    ]
+
+
+chat_history_writer = ChatHistoryWriter(
+    batch_size=settings.CHAT_HISTORY_BATCH_SIZE,
+    flush_seconds=settings.CHAT_HISTORY_FLUSH_SECONDS,
+    max_queue=settings.CHAT_HISTORY_MAX_QUEUE,
+)
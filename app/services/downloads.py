@@ -0,0 +1,186 @@
+import datetime
+import os
+from email.utils import format_datetime, parsedate_to_datetime
+from pathlib import Path
+from typing import Mapping, Optional, Tuple
+from urllib.parse import quote
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+DOWNLOAD_CHUNK_BYTES = 256 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header asks for bytes past the end of the file."""
+
+
+def strong_etag(sha256: str) -> str:
+    # The stored bytes are addressed by their hash, so it identifies the representation exactly
+    return f'"{sha256}"'
+
+
+def etag_matches(header: str, etag: str, weak: bool) -> bool:
+    """Check an If-None-Match / If-Range style list; `weak` allows W/ tags to match."""
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if weak and candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=` range into an inclusive (start, end) pair.
+
+    Returns None for anything this endpoint serves in full instead (other units, multiple
+    ranges, malformed values), which RFC 9110 allows a server to do.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            start, end = max(size - length, 0), size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if start < 0 or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+class BlobResponse(Response):
+    """Serves a byte range of a stored file.
+
+    When the ASGI server offers the `http.response.zerocopy` extension the kernel copies the
+    file straight to the socket (sendfile); otherwise the range is read in chunks on a worker
+    thread so the event loop never blocks on disk.
+    """
+
+    def __init__(self, path: Path, start: int, end: int, status_code: int, headers: Mapping[str, str],
+                 media_type: Optional[str], send_body: bool = True):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.count = end - start + 1
+        self.send_body = send_body
+        self.headers["content-length"] = str(self.count)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        async with await anyio.open_file(self.path, "rb") as file:
+            if "http.response.zerocopy" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": file.wrapped.fileno(),
+                    "offset": self.start,
+                    "count": self.count,
+                    "more_body": False,
+                })
+                return
+            await file.seek(self.start)
+            remaining = self.count
+            while remaining > 0:
+                chunk = await file.read(min(DOWNLOAD_CHUNK_BYTES, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank under us; close the response rather than hang the client
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def content_disposition(filename: str, inline: bool) -> str:
+    disposition = "inline" if inline else "attachment"
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+def not_modified(request_headers: Mapping[str, str], etag: str, last_modified: datetime.datetime) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since when no ETag was sent."""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag, weak=True)
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=datetime.timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+# Types a browser may render from our own origin; anything else (HTML, SVG, scripts) is always
+# downloaded, since the content type comes from the uploader
+INLINE_SAFE_TYPES = {"application/pdf", "image/png", "image/jpeg", "image/gif", "image/webp", "text/plain"}
+
+
+def inline_allowed(media_type: Optional[str]) -> bool:
+    return (media_type or "").partition(";")[0].strip().lower() in INLINE_SAFE_TYPES
+
+
+def file_download(path: Path, sha256: str, filename: str, media_type: Optional[str],
+                  last_modified: datetime.datetime, request_headers: Mapping[str, str],
+                  method: str = "GET", inline: bool = False) -> Response:
+    """Build the response for a conditional, optionally ranged, download of a stored file."""
+    size = os.stat(path).st_size
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=datetime.timezone.utc)
+    etag = strong_etag(sha256)
+    headers = {
+        "etag": etag,
+        "last-modified": format_datetime(last_modified.astimezone(datetime.timezone.utc), usegmt=True),
+        "accept-ranges": "bytes",
+        # Uploads are per-user; let browsers keep them but revalidate (a cheap 304) each time
+        "cache-control": "private, no-cache",
+        "x-content-type-options": "nosniff",
+    }
+
+    if not_modified(request_headers, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    inline = inline and inline_allowed(media_type)
+    headers["content-disposition"] = content_disposition(filename, inline)
+    if inline:
+        # Even an allowed type gets no scripts, forms or same-origin access when rendered
+        headers["content-security-policy"] = "sandbox"
+    send_body = method != "HEAD"
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    # If-Range with a stale validator means "send me the whole new file"
+    if range_header and (if_range is None or etag_matches(if_range, etag, weak=False)):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+            return BlobResponse(path, start, end, 206, headers, media_type, send_body)
+
+    return BlobResponse(path, 0, size - 1, 200, headers, media_type, send_body)
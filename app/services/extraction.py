@@ -0,0 +1,120 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+from app.config import settings
+
+
+class PdfExtraction(NamedTuple):
+    text: str
+    pages: List[str]  # Full text of each page read; `text` is these joined and cut to max_chars
+    page_count: int
+    pages_read: int
+    truncated: bool  # Stopped early because of the character budget or the time limit
+
+
+def _extract_pdf(path: str, max_chars: Optional[int], first_page: int, last_page: Optional[int],
+                 time_limit: Optional[float]) -> PdfExtraction:
+    # Runs in a worker process. PyPDF2 is imported here so the web process never pays for it
+    # on this path, and pages are read lazily so unread pages are never parsed.
+    import PyPDF2
+
+    started = time.monotonic()
+    reader = PyPDF2.PdfReader(path)
+    page_count = len(reader.pages)
+    end = page_count if last_page is None else min(last_page, page_count)
+
+    parts = []
+    total = 0
+    pages_read = 0
+    truncated = False
+    for number in range(max(first_page, 1) - 1, end):
+        text = reader.pages[number].extract_text() or ""
+        parts.append(text)
+        total += len(text) + 1
+        pages_read += 1
+        if max_chars is not None and total >= max_chars:
+            truncated = number + 1 < end
+            break
+        if time_limit is not None and time.monotonic() - started > time_limit:
+            truncated = number + 1 < end
+            break
+
+    text = "\n".join(parts)
+    if max_chars is not None:
+        text = text[:max_chars]
+    return PdfExtraction(text=text, pages=parts, page_count=page_count, pages_read=pages_read, truncated=truncated)
+
+
+class PdfExtractor:
+    """Runs PDF text extraction in a process pool so parsing never blocks the event loop.
+
+    Each job gets a cooperative time limit (the worker stops between pages and returns what it
+    has) plus a hard timeout for a single page that never finishes. Waiting can't stop a worker
+    stuck inside one page, so a hard timeout kills the pool's processes and starts a new pool;
+    other jobs that were running on the killed pool are retried once on the new one.
+    """
+
+    def __init__(self, max_workers: int, timeout_seconds: float):
+        self.max_workers = max_workers
+        self.timeout_seconds = timeout_seconds
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.jobs = 0
+        self.timeouts = 0
+        self.recycles = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that already runs threads (Gemini pool, to_thread) is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def extract(self, path: Path, max_chars: Optional[int] = None, first_page: int = 1,
+                      last_page: Optional[int] = None) -> PdfExtraction:
+        """Extract text from pages first_page..last_page (1-based, inclusive), up to max_chars."""
+        self.jobs += 1
+        args = (str(path), max_chars, first_page, last_page, self.timeout_seconds)
+        try:
+            return await self._run(*args)
+        except BrokenProcessPool:
+            # Killed along with another job's runaway worker; this job did nothing wrong
+            return await self._run(*args)
+
+    async def _run(self, *args) -> PdfExtraction:
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        job = loop.run_in_executor(pool, _extract_pdf, *args)
+        try:
+            # Allow a little slack past the cooperative limit for the page in progress
+            return await asyncio.wait_for(job, self.timeout_seconds + 5)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._recycle(pool)
+            raise asyncio.TimeoutError(f"PDF extraction took longer than {self.timeout_seconds}s") from None
+
+    def _recycle(self, pool: ProcessPoolExecutor):
+        """Kill `pool`'s workers, the stuck one included, and send later jobs to a fresh pool."""
+        if self._pool is pool:
+            self._pool = None
+        self.recycles += 1
+        # ProcessPoolExecutor has no public way to stop a running task
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+pdf_extractor = PdfExtractor(
+    max_workers=settings.PDF_WORKERS,
+    timeout_seconds=settings.PDF_EXTRACT_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,259 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+from app.config import settings
+from app.services.pools import BoundedThreadPool
+from app.services.resilience import CircuitBreaker, CircuitOpen, LatencyTracker, hedged
+
+_genai = None
+_genai_lock = threading.Lock()
+
+
+def load_genai():
+    """Import and configure the Gemini SDK on first use; importing it takes most of a second."""
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+
+                # Configure Gemini API
+                if settings.GEMINI_API_KEY:
+                    genai.configure(api_key=settings.GEMINI_API_KEY)
+                _genai = genai
+    return _genai
+
+
+class GeminiSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+def _generate(model_name: str, prompt: str) -> str:
+    # Runs on a pool thread: the SDK call blocks for the whole round trip
+    model = load_genai().GenerativeModel(model_name)
+    # The SDK-level timeout is what actually frees the thread when the caller's deadline passes;
+    # cancelling the awaiting coroutine cannot interrupt a call already in progress
+    response = model.generate_content(prompt, request_options={"timeout": settings.GEMINI_TIMEOUT_SECONDS})
+    return response.text
+
+
+def _stream(model_name: str, prompt: str):
+    model = load_genai().GenerativeModel(model_name)
+    response = model.generate_content(
+        prompt, stream=True, request_options={"timeout": settings.GEMINI_STREAM_TIMEOUT_SECONDS}
+    )
+    for chunk in response:
+        if chunk.text:
+            yield chunk.text
+
+
+class GeminiExecutor:
+    """Runs blocking Gemini SDK calls on a bounded thread pool so the event loop stays free."""
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._pool = BoundedThreadPool(max_concurrency, max_queue, thread_name_prefix="gemini")
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    @property
+    def saturated(self) -> bool:
+        return self._pool.full
+
+    async def run(self, func, *args):
+        """Run `func(*args)` on the pool, failing fast with GeminiSaturated when full."""
+        if self.saturated:
+            self.rejected += 1
+            raise GeminiSaturated(
+                f"Gemini executor saturated ({self._pool.pending} calls pending)"
+            )
+
+        started = time.perf_counter()
+        # A running call keeps its slot until the SDK call returns or hits its own timeout
+        return await self._pool.run(func, *args, on_done=lambda future: self._record(future, started))
+
+    def _record(self, future: Future, started: float):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.errors += 1
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.last_ms = elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    async def generate(self, prompt: str, model_name: Optional[str] = None) -> str:
+        """Generate a full answer for `prompt` and return its text."""
+        return await self.run(_generate, model_name or settings.GEMINI_MODEL, prompt)
+
+    async def stream(self, prompt: str, model_name: Optional[str] = None):
+        """Yield text chunks as Gemini generates them.
+
+        The streaming SDK call runs on a pool thread and hands chunks back to the
+        event loop through a queue; closing the generator stops the producer.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        stop = threading.Event()
+
+        def produce():
+            for text in _stream(model_name or settings.GEMINI_MODEL, prompt):
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, text)
+
+        def on_done(done_task):
+            # Mark the error retrieved in case the consumer has already gone away
+            if not done_task.cancelled():
+                done_task.exception()
+            queue.put_nowait(finished)
+
+        # The done callback is queued after every chunk the producer scheduled
+        task = asyncio.ensure_future(self.run(produce))
+        task.add_done_callback(on_done)
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    break
+                yield item
+            # Surface producer errors (including GeminiSaturated) to the caller
+            task.result()
+        finally:
+            stop.set()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "pending": self._pool.pending,
+            "calls": self.calls,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 1),
+            "last_ms": round(self.last_ms, 1),
+        }
+
+
+gemini_executor = GeminiExecutor(
+    max_concurrency=settings.GEMINI_MAX_CONCURRENCY,
+    max_queue=settings.GEMINI_MAX_QUEUE,
+)
+
+
+class GeminiUpstream:
+    """Deadlines, circuit breaking and optional hedged retries around GeminiExecutor calls.
+
+    Saturation of the local executor is not an upstream failure, so it never trips the breaker.
+    """
+
+    def __init__(self, executor: GeminiExecutor, breaker: CircuitBreaker, timeout_seconds: float,
+                 hedge_percentile: float = 0, hedge_min_samples: int = 20):
+        self.executor = executor
+        self.breaker = breaker
+        self.timeout_seconds = timeout_seconds
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency = LatencyTracker()
+        self.timeouts = 0
+        self.hedges = 0
+
+    def _hedge_after(self) -> Optional[float]:
+        if not self.hedge_percentile:
+            return None
+        return self.latency.percentile(self.hedge_percentile, self.hedge_min_samples)
+
+    def _acquire(self):
+        if not self.breaker.allow():
+            raise CircuitOpen("Gemini circuit breaker is open")
+
+    def _record_error(self, error: BaseException):
+        if isinstance(error, GeminiSaturated):
+            self.breaker.release()
+        elif isinstance(error, asyncio.CancelledError):
+            self.breaker.release()
+        else:
+            if isinstance(error, asyncio.TimeoutError):
+                self.timeouts += 1
+            self.breaker.record_failure()
+
+    async def generate(self, prompt: str, model_name: Optional[str] = None) -> str:
+        """Generate an answer, raising CircuitOpen, TimeoutError or the upstream error on failure."""
+        self._acquire()
+        attempts = 0
+
+        async def attempt():
+            nonlocal attempts
+            attempts += 1
+            if attempts > 1:
+                self.hedges += 1
+            return await self.executor.generate(prompt, model_name)
+
+        started = time.perf_counter()
+        try:
+            text = await asyncio.wait_for(hedged(attempt, self._hedge_after()), self.timeout_seconds)
+        except asyncio.TimeoutError as e:
+            self._record_error(e)
+            raise asyncio.TimeoutError(f"Gemini call exceeded the {self.timeout_seconds}s deadline") from None
+        except BaseException as e:
+            self._record_error(e)
+            raise
+        self.breaker.record_success()
+        self.latency.record(time.perf_counter() - started)
+        return text
+
+    async def stream(self, prompt: str, model_name: Optional[str] = None):
+        """Stream an answer; the deadline applies to each chunk, so a stream that stalls part way
+        fails like a slow call does."""
+        self._acquire()
+        chunks = self.executor.stream(prompt, model_name)
+        try:
+            while True:
+                try:
+                    text = await asyncio.wait_for(chunks.__anext__(), self.timeout_seconds)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    raise asyncio.TimeoutError(f"Gemini stream stalled for {self.timeout_seconds}s") from None
+                yield text
+        except BaseException as e:
+            if not isinstance(e, GeneratorExit):
+                self._record_error(e)
+            else:
+                self.breaker.release()
+            raise
+        finally:
+            await chunks.aclose()
+        self.breaker.record_success()
+
+    def stats(self) -> dict:
+        return {
+            "circuit_breaker": self.breaker.stats(),
+            "timeout_seconds": self.timeout_seconds,
+            "timeouts": self.timeouts,
+            "hedge_percentile": self.hedge_percentile or None,
+            "hedge_after_seconds": self._hedge_after(),
+            "hedges": self.hedges,
+        }
+
+
+gemini_upstream = GeminiUpstream(
+    gemini_executor,
+    CircuitBreaker(
+        failure_threshold=settings.GEMINI_BREAKER_FAILURES,
+        reset_seconds=settings.GEMINI_BREAKER_RESET_SECONDS,
+    ),
+    timeout_seconds=settings.GEMINI_TIMEOUT_SECONDS,
+    hedge_percentile=settings.GEMINI_HEDGE_PERCENTILE,
+    hedge_min_samples=settings.GEMINI_HEDGE_MIN_SAMPLES,
+)
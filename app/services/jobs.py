@@ -0,0 +1,148 @@
+import asyncio
+import datetime
+from pathlib import Path
+from typing import List, Optional
+from sqlalchemy import select, update
+from app.config import settings
+from app.database import async_session
+from app.models.file import UploadedFile
+from app.services.uploads import extract_upload
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class ExtractionJobQueue:
+    """Background text extraction for uploads made in background mode.
+
+    Job state lives in uploaded_files.status, so nothing is lost when a worker restarts:
+    start() re-queues every upload still pending, plus processing ones whose worker died
+    (updated_at older than `stale_seconds`). Jobs are claimed with a conditional UPDATE, so
+    when several app processes recover the same rows only one of them does the work. A job
+    cancelled by stop() puts its row back to pending for the next start().
+    """
+
+    def __init__(self, workers: int, stale_seconds: float):
+        self.workers = workers
+        self.stale_seconds = stale_seconds
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self.completed = 0
+        self.failed = 0
+        self.recovered = 0
+
+    def submit(self, file_id: str):
+        self._queue.put_nowait(file_id)
+
+    async def start(self):
+        if self._tasks:
+            return
+        try:
+            for file_id in await self._recover():
+                self.submit(file_id)
+        except Exception as e:
+            print(f"Extraction job recovery failed: {str(e)}")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _recover(self) -> List[str]:
+        async with async_session() as session:
+            await session.execute(
+                update(UploadedFile)
+                .where(
+                    UploadedFile.status == "processing",
+                    UploadedFile.updated_at < _now() - datetime.timedelta(seconds=self.stale_seconds)
+                )
+                .values(status="pending")
+            )
+            result = await session.execute(
+                select(UploadedFile.id)
+                .where(UploadedFile.status == "pending")
+                .order_by(UploadedFile.created_at)
+            )
+            file_ids = list(result.scalars())
+            await session.commit()
+        self.recovered += len(file_ids)
+        return file_ids
+
+    async def _claim(self, file_id: str) -> Optional[UploadedFile]:
+        # Own short session: no connection is held while the extraction runs
+        async with async_session() as session:
+            result = await session.execute(
+                update(UploadedFile)
+                .where(UploadedFile.id == file_id, UploadedFile.status == "pending")
+                .values(status="processing", updated_at=_now())
+            )
+            await session.commit()
+            if result.rowcount != 1:
+                return None  # Deleted, or another process got to it first
+            return await session.get(UploadedFile, file_id)
+
+    async def _set_result(self, file_id: str, **values):
+        async with async_session() as session:
+            await session.execute(
+                update(UploadedFile)
+                .where(UploadedFile.id == file_id, UploadedFile.status == "processing")
+                .values(updated_at=_now(), **values)
+            )
+            await session.commit()
+
+    async def _process(self, file_id: str):
+        record = await self._claim(file_id)
+        if record is None:
+            return
+        try:
+            extracted = await extract_upload(
+                record.id, Path(record.storage_path), record.sha256,
+                record.content_type, record.filename, record.size
+            )
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back rather than leave it looking freshly claimed
+            await self._set_result(file_id, status="pending")
+            raise
+        except Exception as e:
+            await self._set_result(file_id, status="failed", error=str(e) or type(e).__name__)
+            self.failed += 1
+            return
+        await self._set_result(
+            file_id,
+            status="failed" if extracted.error else "done",
+            error=extracted.error,
+            text_path=str(extracted.text_path) if extracted.text_path else None,
+            page_count=extracted.page_count,
+            pages_read=extracted.pages_read,
+        )
+        if extracted.error:
+            self.failed += 1
+        else:
+            self.completed += 1
+
+    async def _worker(self):
+        while True:
+            file_id = await self._queue.get()
+            try:
+                await self._process(file_id)
+            except Exception as e:
+                # Left in pending/processing; the next startup's recovery picks it up again
+                print(f"Extraction job {file_id} error: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "workers": len(self._tasks),
+            "completed": self.completed,
+            "failed": self.failed,
+            "recovered": self.recovered,
+        }
+
+
+extraction_jobs = ExtractionJobQueue(
+    workers=settings.EXTRACTION_JOB_WORKERS,
+    stale_seconds=settings.EXTRACTION_JOB_STALE_SECONDS,
+)
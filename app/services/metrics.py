@@ -0,0 +1,249 @@
+import asyncio
+import bisect
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+
+# Seconds; covers a cached chat answer through a slow Gemini call or PDF
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Event-loop lag worth knowing about starts around a millisecond
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+PAGE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(name: str, labelnames: Sequence[str], labels: Tuple[str, ...], value: float,
+            extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{key}="{_escape(str(label))}"' for key, label in zip(labelnames, labels)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    rendered = repr(float(value)) if value != int(value) else str(int(value))
+    return f"{name}{{{','.join(pairs)}}} {rendered}" if pairs else f"{name} {rendered}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def lines(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self.lines()]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def lines(self) -> List[str]:
+        return [_format(self.name, self.labelnames, labels, value) for labels, value in self._values.items()]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+    def lines(self) -> List[str]:
+        return [_format(self.name, self.labelnames, labels, value) for labels, value in self._values.items()]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> per-bucket counts (last slot is +Inf) and the running sum
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labels: str):
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        # Buckets are upper-inclusive (le), so the first bound >= value
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def lines(self) -> List[str]:
+        lines = []
+        for labels, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(_format(f"{self.name}_bucket", self.labelnames, labels, cumulative, ("le", str(bound))))
+            cumulative += counts[-1]
+            lines.append(_format(f"{self.name}_bucket", self.labelnames, labels, cumulative, ("le", "+Inf")))
+            lines.append(_format(f"{self.name}_sum", self.labelnames, labels, self._sums[labels]))
+            lines.append(_format(f"{self.name}_count", self.labelnames, labels, cumulative))
+        return lines
+
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text format.
+
+    Every update happens on the event-loop thread (work handed to thread and process pools is
+    timed by the coroutine awaiting it), so counters are plain dict and float updates with no
+    locks. Each worker process has its own registry; Prometheus scrapes and sums them.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time to serve a request, by route template", ("method", "route", "status")
+)
+gemini_request_duration = registry.histogram(
+    "gemini_request_duration_seconds", "Gemini calls made for chat answers", ("outcome",)
+)
+chat_answers = registry.counter(
+    "chat_answers_total", "Chat answers by where they came from (gemini, cache, fallback)", ("source",)
+)
+pdf_extraction_duration = registry.histogram(
+    "pdf_extraction_duration_seconds", "PDF text extraction in the process pool", ("outcome",)
+)
+pdf_extraction_pages = registry.histogram(
+    "pdf_extraction_pages", "Page count of extracted PDFs", buckets=PAGE_BUCKETS
+)
+pdf_extractions = registry.counter(
+    "pdf_extractions_total", "PDF uploads by whether extraction ran or was reused", ("result",)
+)
+password_hash_duration = registry.histogram(
+    "password_hash_duration_seconds", "bcrypt time on the hashing pool, excluding queueing", ("operation",)
+)
+db_connection_acquire = registry.histogram(
+    "db_connection_acquire_seconds", "Checking a connection out of the pool for a database session"
+)
+event_loop_lag = registry.histogram(
+    "event_loop_lag_seconds", "How late the event loop woke a periodic timer", buckets=LAG_BUCKETS
+)
+event_loop_lag_last = registry.gauge(
+    "event_loop_lag_last_seconds", "Most recent event-loop lag measurement"
+)
+
+
+def route_template(scope: Scope) -> str:
+    """The matched route's path template, e.g. /api/files/{file_id}, for the request in scope."""
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if template is None:
+        # Unmatched paths share one label so scanners can't blow up the series count
+        return "unmatched"
+    # Routes added with include_router(prefix=...) report their path without the prefix;
+    # recover it from the part of the request path in front of the matched route
+    try:
+        matched = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    path = scope["path"]
+    return path[:len(path) - len(matched)] + template if path.endswith(matched) else template
+
+
+class MetricsMiddleware:
+    """Times every HTTP request and records it under its route template, not the raw path."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_request_duration.observe(time.perf_counter() - started, scope["method"], route_template(scope), str(status))
+
+
+class EventLoopMonitor:
+    """Measures event-loop lag: how much later than scheduled a periodic sleep wakes up.
+
+    Anything blocking the loop (CPU-heavy work or a sync call in a coroutine) shows up here
+    for every request sharing the worker.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None and self.interval_seconds > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval_seconds
+            await asyncio.sleep(self.interval_seconds)
+            lag = max(0.0, loop.time() - expected)
+            event_loop_lag.observe(lag)
+            event_loop_lag_last.set(lag)
+
+
+event_loop_monitor = EventLoopMonitor(interval_seconds=settings.EVENT_LOOP_LAG_INTERVAL_SECONDS)
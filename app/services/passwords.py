@@ -0,0 +1,142 @@
+import math
+import re
+import time
+import bcrypt
+from app.config import settings
+from app.services.metrics import password_hash_duration
+from app.services.pools import BoundedThreadPool
+
+
+class PasswordHasherSaturated(Exception):
+    """Raised when every hashing worker is busy and the wait queue is full."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+PASSWORD_REQUIREMENTS = (
+    "Password must be at least 8 characters long and contain at least one uppercase letter, "
+    "one number, and one special character"
+)
+
+
+def validate_password(password: str) -> bool:
+    """
+    Validate password requirements:
+    - At least 8 characters long
+    - At least one uppercase letter
+    - At least one number
+    - At least one special character
+    """
+    if len(password) < 8:
+        return False
+    if not re.search(r"[A-Z]", password):
+        return False
+    if not re.search(r"\d", password):
+        return False
+    if not re.search(r"[!@#$%^&*()_+\-=\[\]{};':\"\\|,.<>\/?]", password):
+        return False
+    return True
+
+
+def bcrypt_hash(password: str, rounds: int) -> str:
+    # Truncate to 72 bytes (bcrypt limitation)
+    password_bytes = password.encode('utf-8')[:72]
+    return bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def bcrypt_verify(password: str, hashed: str) -> bool:
+    password_bytes = password.encode('utf-8')[:72]
+    try:
+        return bcrypt.checkpw(password_bytes, hashed.encode('utf-8'))
+    except ValueError:
+        return False  # Not a bcrypt hash
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool so a login burst never blocks the event loop.
+
+    bcrypt releases the GIL while hashing, so `max_workers` threads use that many cores. Once
+    `max_workers + max_queue` calls are in flight new ones fail fast with a Retry-After hint
+    based on how long the current backlog should take to clear.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, rounds: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self._pool = BoundedThreadPool(max_workers, max_queue, thread_name_prefix="bcrypt")
+        self.calls = 0
+        self.hashes = 0
+        self.verifies = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.total_wait_ms = 0.0
+
+    def retry_after(self) -> int:
+        # Before any call has finished, assume roughly the cost of bcrypt at 12 rounds
+        avg_seconds = self.total_ms / 1000 / self.calls if self.calls else 0.25
+        return max(1, math.ceil(self._pool.pending / self.max_workers * avg_seconds))
+
+    async def _run(self, operation: str, func, *args):
+        if self._pool.full:
+            self.rejected += 1
+            raise PasswordHasherSaturated(
+                f"Password hashing saturated ({self._pool.pending} calls pending)",
+                retry_after=self.retry_after()
+            )
+
+        queued = time.perf_counter()
+        started = queued
+
+        def timed():
+            nonlocal started
+            started = time.perf_counter()
+            return func(*args)
+
+        def record(future):
+            if future.cancelled():
+                return  # Never started
+            self.calls += 1
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.total_wait_ms += (started - queued) * 1000
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            password_hash_duration.observe(elapsed_ms / 1000, operation)
+
+        return await self._pool.run(timed, on_done=record)
+
+    async def hash(self, password: str) -> str:
+        hashed = await self._run("hash", bcrypt_hash, password, self.rounds)
+        self.hashes += 1
+        return hashed
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        matches = await self._run("verify", bcrypt_verify, password, hashed)
+        self.verifies += 1
+        return matches
+
+    def stats(self) -> dict:
+        calls = self.calls
+        return {
+            "rounds": self.rounds,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self._pool.pending,
+            "calls": calls,
+            "hashes": self.hashes,
+            "verifies": self.verifies,
+            "rejected": self.rejected,
+            "avg_ms": round(self.total_ms / calls, 1) if calls else 0.0,
+            "max_ms": round(self.max_ms, 1),
+            "avg_wait_ms": round(self.total_wait_ms / calls, 1) if calls else 0.0,
+        }
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    rounds=settings.BCRYPT_ROUNDS,
+)
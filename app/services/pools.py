@@ -0,0 +1,46 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+class BoundedThreadPool:
+    """A thread pool for blocking calls with admission control.
+
+    At most `max_workers` calls run and `max_queue` more wait; `full` tells the caller to turn
+    new work away (each user raises its own saturation error). A call holds its slot until the
+    pool job finishes, not until the awaiting coroutine stops waiting: cancelling the caller
+    only cancels a job that hasn't started, since a running thread can't be interrupted.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, thread_name_prefix: str):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        # Running + waiting calls. Only touched from the event loop thread.
+        self.pending = 0
+
+    @property
+    def full(self) -> bool:
+        return self.pending >= self.max_workers + self.max_queue
+
+    async def run(self, func, *args, on_done: Optional[Callable[[Future], None]] = None):
+        """Run `func(*args)` on the pool. `on_done(future)` is called on the event loop when the
+        job has finished, or was cancelled before it started, after its slot is released."""
+        loop = asyncio.get_running_loop()
+
+        def release(future: Future):
+            self.pending -= 1
+            if on_done is not None:
+                on_done(future)
+
+        def schedule_release(future: Future):
+            # Called on the pool thread, or inline when a queued job is cancelled
+            try:
+                loop.call_soon_threadsafe(release, future)
+            except RuntimeError:  # Event loop already closed at shutdown
+                pass
+
+        future = self._executor.submit(func, *args)
+        self.pending += 1
+        future.add_done_callback(schedule_release)
+        return await asyncio.wrap_future(future)
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    closed: calls go through. After `failure_threshold` failures in a row it opens and
+    rejects calls for `reset_seconds`; then it goes half-open and lets a single trial call
+    through, which closes the circuit on success or re-opens it on failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls would be rejected (open, or half-open with the trial already running)."""
+        state = self.state
+        return state == self.OPEN or (state == self.HALF_OPEN and self._trial_in_flight)
+
+    def allow(self) -> bool:
+        """Ask permission for one call; in half-open state only the first caller gets it."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def release(self):
+        """Give back a half-open trial slot when the call ended without telling us anything."""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self._state = self.CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.times_opened += 1
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def stats(self) -> dict:
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self._failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_in_seconds": round(max(self.reset_seconds - (time.monotonic() - self._opened_at), 0), 1)
+            if state == self.OPEN else 0,
+        }
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies (seconds)."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float, min_samples: int = 1) -> Optional[float]:
+        if len(self._samples) < max(min_samples, 1):
+            return None
+        ordered = sorted(self._samples)
+        position = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[position]
+
+
+async def hedged(func: Callable[[], Awaitable], hedge_after: Optional[float]):
+    """Await `func()`; if it hasn't finished after `hedge_after` seconds, race a second attempt.
+
+    The first successful result wins and the other attempt is cancelled. If both fail, the
+    first attempt's error is raised.
+    """
+    if hedge_after is None:
+        return await func()
+
+    first = asyncio.ensure_future(func())
+
+    pending = {first}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=hedge_after)
+        if done:
+            return first.result()
+
+        second = asyncio.ensure_future(func())
+        pending = {first, second}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None:
+                    return task.result()
+        return first.result()
+    finally:
+        for task in pending:
+            task.cancel()
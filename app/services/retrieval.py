@@ -0,0 +1,155 @@
+import re
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import numpy as np
+from app.config import settings
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+WORD_PATTERN = re.compile(r"\S+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough model-token count (about four characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def chunk_text(text: str, words_per_chunk: int, overlap: int) -> List[str]:
+    """Split text into overlapping word windows, sliced from the original so formatting survives."""
+    starts = [m.start() for m in WORD_PATTERN.finditer(text)]
+    if not starts:
+        return []
+    step = max(words_per_chunk - overlap, 1)
+    chunks = []
+    for first in range(0, len(starts), step):
+        last = first + words_per_chunk
+        end = starts[last] if last < len(starts) else len(text)
+        chunks.append(text[starts[first]:end].strip())
+        if last >= len(starts):
+            break
+    return chunks
+
+
+class DocumentIndex:
+    """BM25 index over the chunks of one document.
+
+    Postings are stored column-wise (per term) in flat NumPy arrays, so scoring a query is a few
+    vectorized operations per query term rather than a Python loop over chunks.
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, text: str, words_per_chunk: int, overlap: int):
+        self.chunks = chunk_text(text, words_per_chunk, overlap)
+        self.vocabulary = {}
+        chunk_ids = []
+        term_ids = []
+        for chunk_id, chunk in enumerate(self.chunks):
+            for token in tokenize(chunk):
+                term_ids.append(self.vocabulary.setdefault(token, len(self.vocabulary)))
+                chunk_ids.append(chunk_id)
+
+        n_chunks = len(self.chunks)
+        n_terms = len(self.vocabulary)
+        chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+
+        self.lengths = np.bincount(chunk_ids, minlength=n_chunks).astype(np.float32)
+        self.avg_length = float(self.lengths.mean()) if n_chunks else 0.0
+
+        # Count (term, chunk) pairs; unique() sorts by term first, giving CSC-style postings
+        pairs, tf = np.unique(term_ids * max(n_chunks, 1) + chunk_ids, return_counts=True)
+        posting_terms = pairs // max(n_chunks, 1)
+        self.posting_chunks = (pairs % max(n_chunks, 1)).astype(np.int32)
+        self.posting_tf = tf.astype(np.float32)
+        self.term_offsets = np.searchsorted(posting_terms, np.arange(n_terms + 1))
+
+        doc_freq = np.diff(self.term_offsets).astype(np.float32)
+        self.idf = np.log1p((n_chunks - doc_freq + 0.5) / (doc_freq + 0.5))
+        self.length_norm = self.K1 * (1 - self.B + self.B * self.lengths / (self.avg_length or 1.0))
+
+    def score(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        for token in set(tokenize(query)):
+            term_id = self.vocabulary.get(token)
+            if term_id is None:
+                continue
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            chunk_ids = self.posting_chunks[start:end]
+            tf = self.posting_tf[start:end]
+            # Each chunk appears at most once per term, so plain fancy-index += is safe
+            scores[chunk_ids] += self.idf[term_id] * tf * (self.K1 + 1) / (tf + self.length_norm[chunk_ids])
+        return scores
+
+    def top_chunks(self, query: str, top_k: int, token_budget: int) -> List[Tuple[int, str]]:
+        """Best-scoring chunks that fit the token budget, returned in document order."""
+        if not self.chunks:
+            return []
+        scores = self.score(query)
+        if scores.any():
+            ranked = [chunk_id for chunk_id in np.argsort(-scores, kind="stable") if scores[chunk_id] > 0]
+        else:
+            # Nothing in the query matched; the start of the document is the best guess
+            ranked = range(len(self.chunks))
+
+        selected = []
+        used = 0
+        for chunk_id in ranked:
+            if len(selected) >= top_k:
+                break
+            cost = estimate_tokens(self.chunks[chunk_id])
+            if used + cost > token_budget:
+                continue
+            selected.append(int(chunk_id))
+            used += cost
+        return [(chunk_id, self.chunks[chunk_id]) for chunk_id in sorted(selected)]
+
+
+class DocumentIndexRegistry:
+    """Per-process store of DocumentIndex objects keyed by upload id, evicting least recently used."""
+
+    def __init__(self, max_documents: int, words_per_chunk: int, overlap: int):
+        self.max_documents = max_documents
+        self.words_per_chunk = words_per_chunk
+        self.overlap = overlap
+        self._indexes: OrderedDict = OrderedDict()
+
+    def add(self, file_id: str, text: str) -> DocumentIndex:
+        index = DocumentIndex(text, self.words_per_chunk, self.overlap)
+        self._indexes[file_id] = index
+        self._indexes.move_to_end(file_id)
+        while len(self._indexes) > self.max_documents:
+            self._indexes.popitem(last=False)
+        return index
+
+    def get(self, file_id: str) -> Optional[DocumentIndex]:
+        index = self._indexes.get(file_id)
+        if index is not None:
+            self._indexes.move_to_end(file_id)
+        return index
+
+    def remove(self, file_id: str):
+        self._indexes.pop(file_id, None)
+
+    def excerpts(self, file_id: str, query: str, top_k: Optional[int] = None, token_budget: Optional[int] = None) -> Optional[str]:
+        """Join the chunks of `file_id` most relevant to `query`, or None if the file isn't indexed."""
+        index = self.get(file_id)
+        if index is None:
+            return None
+        chunks = index.top_chunks(
+            query,
+            top_k or settings.RETRIEVAL_TOP_K,
+            token_budget or settings.RETRIEVAL_TOKEN_BUDGET
+        )
+        return "\n\n[...]\n\n".join(text for _, text in chunks) or None
+
+
+document_indexes = DocumentIndexRegistry(
+    max_documents=settings.RETRIEVAL_MAX_DOCUMENTS,
+    words_per_chunk=settings.RETRIEVAL_CHUNK_WORDS,
+    overlap=settings.RETRIEVAL_CHUNK_OVERLAP,
+)
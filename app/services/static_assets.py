@@ -0,0 +1,134 @@
+import gzip
+import hashlib
+import mimetypes
+from pathlib import Path
+from typing import Dict, Mapping, NamedTuple, Optional
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip variants are built
+    brotli = None
+
+# Hashed build output (Vite puts it under assets/) never changes under the same name
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Everything else (index.html, favicon...) is revalidated each time; a match costs a 304
+REVALIDATE_CACHE_CONTROL = "no-cache"
+MIN_COMPRESS_BYTES = 256
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml",
+                      "application/xml", "application/manifest+json", "application/wasm")
+# Preferred first when a client accepts several
+ENCODINGS = ("br", "gzip")
+PRECOMPRESSED_SUFFIXES = {".br": "br", ".gz": "gzip"}
+
+
+class StaticAsset(NamedTuple):
+    media_type: str
+    etag: str  # Of the identity bytes; encoded variants get a suffix
+    cache_control: str
+    variants: Dict[str, bytes]  # content-coding ("identity", "gzip", "br") -> body
+
+
+def accepted_encodings(header: Optional[str]) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+class StaticAssetCache:
+    """The built SPA held in memory, with precompressed variants and strong ETags.
+
+    load() reads every file once; compress() builds gzip/brotli variants (reusing .gz/.br
+    files shipped in the build) and is slow enough at maximum compression to run on a worker
+    thread after startup. Until it finishes, files are served uncompressed.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.assets: Dict[str, StaticAsset] = {}
+        self.compressed = False
+
+    def load(self):
+        assets = {}
+        for path in sorted(self.root.rglob("*")):
+            if not path.is_file() or path.suffix in PRECOMPRESSED_SUFFIXES:
+                continue
+            relative = path.relative_to(self.root).as_posix()
+            body = path.read_bytes()
+            media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            if media_type.startswith("text/") or media_type == "application/javascript":
+                media_type += "; charset=utf-8"
+            assets[relative] = StaticAsset(
+                media_type=media_type,
+                etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+                cache_control=IMMUTABLE_CACHE_CONTROL if relative.startswith("assets/") else REVALIDATE_CACHE_CONTROL,
+                variants={"identity": body},
+            )
+        self.assets = assets
+
+    def compress(self):
+        for relative, asset in self.assets.items():
+            body = asset.variants["identity"]
+            if len(body) < MIN_COMPRESS_BYTES or not asset.media_type.startswith(COMPRESSIBLE_TYPES):
+                continue
+            variants = dict(asset.variants)
+            for suffix, coding in PRECOMPRESSED_SUFFIXES.items():
+                shipped = self.root / f"{relative}{suffix}"
+                if shipped.is_file():
+                    variants[coding] = shipped.read_bytes()
+            if "gzip" not in variants:
+                variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if "br" not in variants and brotli is not None:
+                variants["br"] = brotli.compress(body, quality=11)
+            # Keep only variants that actually save bytes; swapping the tuple keeps readers consistent
+            variants = {coding: data for coding, data in variants.items()
+                        if coding == "identity" or len(data) < len(body)}
+            self.assets[relative] = asset._replace(variants=variants)
+        self.compressed = True
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        return self.assets.get(path)
+
+    def response(self, asset: StaticAsset, request_headers: Mapping[str, str]) -> Response:
+        accepted = accepted_encodings(request_headers.get("accept-encoding"))
+        coding = next((c for c in ENCODINGS if c in asset.variants and accepted.get(c, 0) > 0), "identity")
+        etag = asset.etag if coding == "identity" else f'{asset.etag[:-1]}-{coding}"'
+        headers = {
+            "etag": etag,
+            "cache-control": asset.cache_control,
+            "vary": "Accept-Encoding",
+        }
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            # Any encoding of the same bytes is still current
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            variant_tags = {asset.etag} | {f'{asset.etag[:-1]}-{c}"' for c in asset.variants}
+            if "*" in tags or tags & variant_tags:
+                return Response(status_code=304, headers=headers)
+
+        if coding != "identity":
+            headers["content-encoding"] = coding
+        return Response(content=asset.variants[coding], headers=headers, media_type=asset.media_type)
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self.assets),
+            "compressed": self.compressed,
+            "brotli": brotli is not None,
+            "bytes": {
+                coding: sum(len(a.variants.get(coding, a.variants["identity"])) for a in self.assets.values())
+                for coding in ("identity",) + ENCODINGS
+            },
+        }
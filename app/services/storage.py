@@ -0,0 +1,89 @@
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Optional
+
+
+class ContentStore:
+    """Content-addressed storage for uploads.
+
+    Bytes are stored once under blobs/<first two hex chars>/<sha256>. Each upload id is a hard
+    link to its blob, so the filesystem keeps the reference count (link count - 1). Which blob
+    an upload points at is recorded in the uploaded_files table. Cached extraction results
+    live next to the blob as <sha256>.<kind>.json, and the full extracted text as <sha256>.text
+    (see app/services/textstore.py).
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.blobs_dir = root / "blobs"
+        self.tmp_dir = root / "tmp"
+        for directory in (self.blobs_dir, self.tmp_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def temp_path(self) -> Path:
+        """A fresh path on the same filesystem as the blobs, so commit() can rename atomically."""
+        return self.tmp_dir / uuid.uuid4().hex
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.blobs_dir / sha256[:2] / sha256
+
+    def commit(self, temp_path: Path, sha256: str) -> bool:
+        """Move a fully written temp file into the store; returns False if the bytes were already stored."""
+        blob = self.blob_path(sha256)
+        blob.parent.mkdir(exist_ok=True)
+        try:
+            # link() refuses to overwrite, so two identical uploads racing here can't swap inodes
+            os.link(temp_path, blob)
+            created = True
+        except FileExistsError:
+            created = False
+        temp_path.unlink(missing_ok=True)
+        return created
+
+    def extraction_path(self, sha256: str, kind: str) -> Path:
+        return self.blob_path(sha256).with_name(f"{sha256}.{kind}.json")
+
+    def text_path(self, sha256: str) -> Path:
+        return self.blob_path(sha256).with_name(f"{sha256}.text")
+
+    def add_reference(self, sha256: str, link_path: Path):
+        """Expose a stored blob as `link_path` for one upload."""
+        os.link(self.blob_path(sha256), link_path)
+
+    def ref_count(self, sha256: str) -> int:
+        try:
+            return self.blob_path(sha256).stat().st_nlink - 1
+        except FileNotFoundError:
+            return 0
+
+    def remove_reference(self, sha256: str, link_path: Path):
+        """Drop one upload's link; the blob and its cached extractions and text go with the last reference."""
+        link_path.unlink(missing_ok=True)
+        if self.ref_count(sha256) == 0:
+            blob = self.blob_path(sha256)
+            for sidecar in blob.parent.glob(f"{sha256}.*"):
+                sidecar.unlink(missing_ok=True)
+            blob.unlink(missing_ok=True)
+
+    def load_extraction(self, sha256: str, kind: str) -> Optional[dict]:
+        path = self.extraction_path(sha256, kind)
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save_extraction(self, sha256: str, kind: str, result: dict):
+        path = self.extraction_path(sha256, kind)
+        temp = self.temp_path()
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        os.replace(temp, path)
+
+
+UPLOAD_DIR = Path("uploads")
+
+# Identical uploads share one stored copy and one cached extraction
+content_store = ContentStore(UPLOAD_DIR)
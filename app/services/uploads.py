@@ -0,0 +1,201 @@
+import asyncio
+import hashlib
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+from fastapi import UploadFile
+from app.auth.tokens import TokenUser
+from app.config import settings
+from app.database import async_session
+from app.models.file import UploadedFile
+from app.services.extraction import pdf_extractor
+from app.services.metrics import pdf_extraction_duration, pdf_extraction_pages, pdf_extractions
+from app.services.retrieval import DocumentIndex, document_indexes
+from app.services.storage import content_store
+from app.services.textstore import PagedText, segment_text, write_paged_text
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+TEXT_EXTENSIONS = [".txt", ".md", ".py", ".js", ".json"]
+
+
+class UploadTooLarge(Exception):
+    """Raised as soon as an upload passes the configured size limit."""
+
+
+class SavedUpload(NamedTuple):
+    size: int
+    sha256: str
+
+
+class ExtractedUpload(NamedTuple):
+    content: str
+    text_path: Optional[Path] = None  # Where the extracted text is kept, if any
+    page_count: Optional[int] = None
+    pages_read: Optional[int] = None
+    truncated: bool = False
+    cached: bool = False
+    chunks: int = 0
+    error: Optional[str] = None
+
+
+async def stream_to_disk(upload: UploadFile, destination: Path, max_bytes: int) -> SavedUpload:
+    """Copy an upload to `destination` chunk by chunk, hashing and sizing it on the way.
+
+    Only one chunk is held in memory at a time and file writes run on a worker thread.
+    A partially written file is removed if the upload is too large or the copy fails.
+    """
+    # Starlette already knows the size of a spooled multipart part; reject before copying anything
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLarge(f"File exceeds the maximum upload size of {max_bytes} bytes")
+
+    digest = hashlib.sha256()
+    size = 0
+    handle = await asyncio.to_thread(open, destination, "wb")
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"File exceeds the maximum upload size of {max_bytes} bytes")
+            digest.update(chunk)
+            await asyncio.to_thread(handle.write, chunk)
+    except BaseException:
+        await asyncio.to_thread(handle.close)
+        destination.unlink(missing_ok=True)
+        raise
+    await asyncio.to_thread(handle.close)
+    return SavedUpload(size=size, sha256=digest.hexdigest())
+
+
+def read_text_file(path: Path) -> str:
+    """Decode a saved text upload as UTF-8, falling back to Latin-1."""
+    content = path.read_bytes()
+    try:
+        return content.decode('utf-8')
+    except UnicodeDecodeError:
+        return content.decode('latin-1')
+
+
+def read_stored_text(text_path: Path, start: int = 0, end: Optional[int] = None) -> str:
+    """Characters [start, end) of stored extracted text, decompressing only the blocks needed."""
+    with PagedText(text_path) as text:
+        return text.chars(start, end)
+
+
+def read_stored_range(text_path: Path, start: int, end: int) -> Tuple[str, int]:
+    """Like read_stored_text, also returning the stored text's total length."""
+    with PagedText(text_path) as text:
+        return text.chars(start, end), text.char_count
+
+
+def read_stored_pages(text_path: Path, first_page: int, last_page: int) -> str:
+    """Pages first_page..last_page (1-based, inclusive) of a stored PDF text."""
+    with PagedText(text_path) as text:
+        return text.blocks(first_page - 1, last_page - 1)
+
+
+async def extract_pdf_cached(sha256: str, file_path: Path) -> dict:
+    """Extract a PDF once per distinct content; repeat uploads reuse the cached result.
+
+    The sidecar JSON holds the page counts; the text of every page read goes to the paged
+    text store.
+    """
+    budget = settings.PDF_EXTRACT_MAX_CHARS
+    text_path = content_store.text_path(sha256)
+    cached = await asyncio.to_thread(content_store.load_extraction, sha256, "pdf")
+    if cached and text_path.exists() and (not cached["truncated"] or cached["max_chars"] >= budget):
+        text = await asyncio.to_thread(read_stored_text, text_path, 0, budget)
+        pdf_extractions.inc("cached")
+        return {**cached, "text": text, "cached": True}
+
+    started = time.perf_counter()
+    try:
+        extraction = await pdf_extractor.extract(file_path, max_chars=budget)
+    except Exception:
+        pdf_extractions.inc("failed")
+        pdf_extraction_duration.observe(time.perf_counter() - started, "error")
+        raise
+    pdf_extractions.inc("extracted")
+    pdf_extraction_duration.observe(time.perf_counter() - started, "ok")
+    pdf_extraction_pages.observe(extraction.page_count)
+    await asyncio.to_thread(write_paged_text, text_path, extraction.pages, "\n")
+    result = {
+        "page_count": extraction.page_count,
+        "pages_read": extraction.pages_read,
+        "truncated": extraction.truncated,
+        "max_chars": budget,
+    }
+    await asyncio.to_thread(content_store.save_extraction, sha256, "pdf", result)
+    return {**result, "text": extraction.text, "cached": False}
+
+
+def store_text_file(sha256: str, file_path: Path) -> str:
+    """Decode a text upload and keep it in the paged text store (once per distinct content)."""
+    content = read_text_file(file_path)
+    text_path = content_store.text_path(sha256)
+    if not text_path.exists():
+        write_paged_text(text_path, segment_text(content), "")
+    return content
+
+
+async def extract_upload(file_id: str, file_path: Path, sha256: str, file_type: Optional[str],
+                         filename: str, size: int) -> ExtractedUpload:
+    """Extract a saved upload's text by type and index it for chat retrieval."""
+    file_type = file_type or ""
+    file_extension = Path(filename).suffix
+
+    if file_type == "application/pdf":
+        # Extract text from PDF in the process pool, stopping once the character budget is met
+        try:
+            extraction = await extract_pdf_cached(sha256, file_path)
+        except Exception as e:
+            return ExtractedUpload(content=f"PDF processing failed: {str(e)}", error=str(e) or type(e).__name__)
+        result = ExtractedUpload(
+            content=extraction["text"],
+            text_path=content_store.text_path(sha256),
+            page_count=extraction["page_count"],
+            pages_read=extraction["pages_read"],
+            truncated=extraction["truncated"],
+            cached=extraction["cached"],
+        )
+    elif file_type.startswith("text/") or file_extension in TEXT_EXTENSIONS:
+        content = await asyncio.to_thread(store_text_file, sha256, file_path)
+        result = ExtractedUpload(content=content, text_path=content_store.text_path(sha256))
+    elif file_type.startswith("image/"):
+        # For images, we'll just note that it's an image
+        # In a real implementation, you might use OCR or image analysis
+        return ExtractedUpload(content=f"Image file: {filename} ({size} bytes)")
+    else:
+        return ExtractedUpload(content=f"File type {file_type} - content extraction not supported")
+
+    # Index the full text so chat requests with this file_id get the relevant passages
+    index = await asyncio.to_thread(document_indexes.add, file_id, result.content)
+    return result._replace(chunks=len(index.chunks))
+
+
+def visible_to(record: UploadedFile, user: Optional[TokenUser]) -> bool:
+    """Files uploaded while signed in belong to that user; anonymous uploads are reachable by id alone."""
+    return record.owner_id is None or (user is not None and user.id == record.owner_id)
+
+
+async def load_document_index(file_id: str, user: Optional[TokenUser]) -> Optional[DocumentIndex]:
+    """The retrieval index of an upload `user` may read, rebuilt from its stored text when this
+    process doesn't hold it (after a restart, on another worker, or once evicted). None if the
+    upload is unknown, someone else's, or has no extracted text yet."""
+    async with async_session() as session:
+        record = await session.get(UploadedFile, file_id)
+    # Checked before the in-memory index too: it is keyed by id alone
+    if record is None or not visible_to(record, user):
+        return None
+    index = document_indexes.get(file_id)
+    if index is not None:
+        return index
+    if record.status != "done" or record.text_path is None:
+        return None
+    try:
+        text = await asyncio.to_thread(read_stored_text, Path(record.text_path))
+    except FileNotFoundError:
+        return None
+    return await asyncio.to_thread(document_indexes.add, file_id, text)
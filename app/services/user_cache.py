@@ -0,0 +1,103 @@
+from typing import NamedTuple, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.user import User
+from app.services.lru import LRUCache
+
+
+class CachedUser(NamedTuple):
+    """Detached snapshot of a users row; safe to share between requests and sessions."""
+    id: int
+    name: str
+    email: str
+    password: str
+
+
+# Marks an email known not to have an account
+_MISSING = object()
+
+
+def snapshot(user: User) -> CachedUser:
+    return CachedUser(id=user.id, name=user.name, email=user.email, password=user.password)
+
+
+class UserCache:
+    """Read-through, per-worker cache of user rows keyed by email and by id.
+
+    Unknown emails are cached too, for a shorter `negative_ttl_seconds`, so repeated logins
+    with a mistyped address don't each cost a query. put() and invalidate() keep this worker
+    current on signup; other workers catch up within the TTLs.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, negative_ttl_seconds: int):
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.by_email = LRUCache(max_entries, ttl_seconds)
+        self.by_id = LRUCache(max_entries, ttl_seconds)
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def put(self, user) -> CachedUser:
+        cached = user if isinstance(user, CachedUser) else snapshot(user)
+        self.by_email.set(cached.email, cached)
+        self.by_id.set(cached.id, cached)
+        return cached
+
+    def invalidate(self, user_id: Optional[int] = None, email: Optional[str] = None):
+        self.invalidations += 1
+        if user_id is not None:
+            cached = self.by_id.pop(user_id)
+            if cached is not None:
+                self.by_email.pop(cached.email)
+        if email is not None:
+            cached = self.by_email.pop(email)
+            if isinstance(cached, CachedUser):
+                self.by_id.pop(cached.id)
+
+    async def get_by_email(self, db: AsyncSession, email: str) -> Optional[CachedUser]:
+        cached = self.by_email.get(email)
+        if cached is _MISSING:
+            self.negative_hits += 1
+            return None
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        result = await db.execute(select(User).where(User.email == email))
+        user = result.scalar_one_or_none()
+        if user is None:
+            self.by_email.set(email, _MISSING, ttl_seconds=self.negative_ttl_seconds)
+            return None
+        return self.put(user)
+
+    async def get_by_id(self, db: AsyncSession, user_id: int) -> Optional[CachedUser]:
+        cached = self.by_id.get(user_id)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        user = await db.get(User, user_id)
+        return self.put(user) if user is not None else None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "email_entries": len(self.by_email),
+            "id_entries": len(self.by_id),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": round((self.hits + self.negative_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+
+user_cache = UserCache(
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.USER_CACHE_NEGATIVE_TTL_SECONDS,
+)
@@ -0,0 +1,184 @@
+import asyncio
+import csv
+import io
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.user import User
+from app.schemas.user import UserCreate
+from app.services.passwords import (
+    PASSWORD_REQUIREMENTS, PasswordHasher, PasswordHasherSaturated, password_hasher, validate_password
+)
+
+# 3 bind parameters per row; asyncpg allows 32767 per statement
+INSERT_BATCH_ROWS = 1000
+
+
+class ImportFormatError(Exception):
+    """Raised when an import file can't be read as CSV or JSONL at all."""
+
+
+def detect_format(filename: Optional[str], requested: Optional[str] = None) -> str:
+    if requested:
+        fmt = requested.lower()
+    else:
+        fmt = os.path.splitext(filename or "")[1].lstrip(".").lower()
+        fmt = {"ndjson": "jsonl", "json": "jsonl"}.get(fmt, fmt)
+    if fmt not in ("csv", "jsonl"):
+        raise ImportFormatError("Import files must be CSV (name,email,password header) or JSONL")
+    return fmt
+
+
+def parse_rows(data: bytes, fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (line number, row, parse error) for each record in the file."""
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ImportFormatError("Import files must be UTF-8 encoded")
+
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        missing = {"name", "email", "password"} - set(reader.fieldnames or [])
+        if missing:
+            raise ImportFormatError(f"CSV header is missing: {', '.join(sorted(missing))}")
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "Each line must be a JSON object"
+            continue
+        yield line_number, row, None
+
+
+def validate_rows(data: bytes, fmt: str) -> Tuple[List[dict], List[UserCreate]]:
+    """Check every row like /api/signup does; returns the report entries and the valid users."""
+    report: List[dict] = []
+    valid: List[UserCreate] = []
+    seen = set()
+    for line_number, row, error in parse_rows(data, fmt):
+        entry = {"line": line_number, "email": (row or {}).get("email")}
+        report.append(entry)
+        if error is None:
+            try:
+                user = UserCreate.model_validate(row)
+            except ValidationError as e:
+                error = "; ".join(f"{'.'.join(map(str, item['loc']))}: {item['msg']}" for item in e.errors())
+            else:
+                if not validate_password(user.password):
+                    error = PASSWORD_REQUIREMENTS
+                elif user.email in seen:
+                    entry.update(status="duplicate", error="Email appears earlier in the file")
+                    continue
+                else:
+                    seen.add(user.email)
+                    entry["email"] = user.email
+                    entry["status"] = "pending"
+                    valid.append(user)
+                    continue
+        entry.update(status="invalid", error=error)
+    return report, valid
+
+
+async def existing_emails(db: AsyncSession, emails: List[str]) -> Dict[str, int]:
+    found: Dict[str, int] = {}
+    for start in range(0, len(emails), INSERT_BATCH_ROWS):
+        result = await db.execute(
+            select(User.email, User.id).where(User.email.in_(emails[start:start + INSERT_BATCH_ROWS]))
+        )
+        found.update({email: user_id for email, user_id in result})
+    return found
+
+
+def import_concurrency() -> int:
+    """Hashes an import started over HTTP keeps in flight on the shared hasher:
+    USER_IMPORT_HASH_WORKERS, but never more than half its workers, so logins and signups
+    always have threads of their own."""
+    return max(1, min(settings.USER_IMPORT_HASH_WORKERS, password_hasher.max_workers // 2))
+
+
+def offline_hasher() -> PasswordHasher:
+    """A hasher for imports run outside the web app (import_users.py), where there are no
+    logins to leave room for: USER_IMPORT_HASH_WORKERS threads, all of them for the import."""
+    return PasswordHasher(
+        max_workers=settings.USER_IMPORT_HASH_WORKERS, max_queue=0, rounds=settings.BCRYPT_ROUNDS
+    )
+
+
+async def hash_passwords(passwords: List[str], hasher: PasswordHasher, concurrency: int) -> List[str]:
+    """Hash on `hasher` (its admission control and metrics apply), keeping at most
+    `concurrency` of its slots busy."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def hash_one(password: str) -> str:
+        async with semaphore:
+            while True:
+                try:
+                    return await hasher.hash(password)
+                except PasswordHasherSaturated as e:
+                    # Logins have filled the queue; wait for it to drain instead of failing the import
+                    await asyncio.sleep(e.retry_after)
+
+    # Cancelling the import cancels the hashes still queued on the pool
+    return await asyncio.gather(*(hash_one(password) for password in passwords))
+
+
+async def import_users(db: AsyncSession, data: bytes, fmt: str, hasher: Optional[PasswordHasher] = None) -> dict:
+    """Create accounts from a CSV/JSONL file and report what happened to every row.
+
+    Passwords are hashed on the app's shared hasher, leaving room for logins, unless a
+    dedicated `hasher` is given, in which case the import may use all of its workers.
+
+    Emails that already exist are reported without hashing their passwords. New rows are
+    written with batched INSERT ... ON CONFLICT DO NOTHING, so an account created concurrently
+    (e.g. by a signup) is reported as existing rather than failing the batch.
+    """
+    report, users = await asyncio.to_thread(validate_rows, data, fmt)
+    by_email = {entry["email"]: entry for entry in report if entry.get("status") == "pending"}
+
+    known = await existing_emails(db, [user.email for user in users])
+    for email, user_id in known.items():
+        by_email[email].update(status="exists", id=user_id)
+    new_users = [user for user in users if user.email not in known]
+
+    passwords = [user.password for user in new_users]
+    if hasher is None:
+        hashes = await hash_passwords(passwords, password_hasher, import_concurrency())
+    else:
+        hashes = await hash_passwords(passwords, hasher, hasher.max_workers)
+    rows = [
+        {"name": user.name, "email": user.email, "password": hashed}
+        for user, hashed in zip(new_users, hashes)
+    ]
+    for start in range(0, len(rows), INSERT_BATCH_ROWS):
+        statement = (
+            insert(User)
+            .values(rows[start:start + INSERT_BATCH_ROWS])
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.email, User.id)
+        )
+        result = await db.execute(statement)
+        for email, user_id in result:
+            by_email[email].update(status="created", id=user_id)
+        await db.commit()
+    for entry in by_email.values():
+        if entry["status"] == "pending":
+            entry["status"] = "exists"  # Lost the ON CONFLICT race to another writer
+
+    counts: Dict[str, int] = {}
+    for entry in report:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    return {"total": len(report), "counts": counts, "rows": report}
@@ -0,0 +1,57 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from app.auth.oauth import get_oauth
+from app.config import settings
+from app.services.gemini import load_genai
+
+# SDKs that are imported lazily; loaded here so the first chat or Google login doesn't pay for them
+LOADERS = {
+    "gemini": load_genai,
+    "oauth": get_oauth,
+}
+
+
+class WarmUp:
+    """Loads the lazily imported SDKs on a worker thread shortly after startup.
+
+    The delay lets the server bind its port and answer health checks first; a request that
+    needs an SDK before warm-up reaches it simply loads it itself.
+    """
+
+    def __init__(self, delay_seconds: float):
+        self.delay_seconds = delay_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.loaded_ms: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        await asyncio.sleep(self.delay_seconds)
+        for name, loader in LOADERS.items():
+            started = time.perf_counter()
+            try:
+                await asyncio.to_thread(loader)
+                self.loaded_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+            except Exception as e:
+                self.errors[name] = str(e)
+                print(f"Warm-up of {name} failed: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "done": len(self.loaded_ms) + len(self.errors) == len(LOADERS),
+            "loaded_ms": self.loaded_ms,
+            "errors": self.errors,
+        }
+
+
+warm_up = WarmUp(delay_seconds=settings.WARMUP_DELAY_SECONDS)
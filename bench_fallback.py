@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the fallback answer engine.
+
+Compares the per-call cost of the old get_enhanced_response (rebuild the subject guides,
+chained keyword scans, concatenate follow-ups on every call) with the build-once
+FallbackEngine. Run from the project root: python bench_fallback.py
+"""
+
+import timeit
+from app.services.fallback import INTENTS, GENERAL_HEAD, GENERAL_TAIL, fallback_engine, load_knowledge
+
+KNOWLEDGE = load_knowledge()
+
+QUERIES = [
+    ("What is the UPSC syllabus?", "UPSC"),
+    ("How to prepare for GATE in 6 months", "GATE"),
+    ("Best sources for monthly current affairs", "SSC"),
+    ("Which reference books should I read?", "GATE"),
+    ("Where can I find previous year papers and mock test series?", "Banking"),
+    ("Explain the doctrine of basic structure", "UPSC"),
+    ("Tell me about fundamental rights in detail, with examples from landmark cases", "Railways"),
+]
+
+
+def legacy_enhanced_response(message: str, subject: str) -> str:
+    """Approximates the pre-engine algorithm: per-call guide rebuild, chained any() scans, concatenation."""
+    message_lower = message.lower()
+    # Stands in for the dict literal of large strings the old function built on every call
+    subject_guides = {name: dict(responses) for name, responses in KNOWLEDGE.items()}
+
+    for intent in INTENTS:
+        if any(word in message_lower for word in intent.keywords):
+            response = subject_guides.get(subject, {}).get(intent.name)
+            if response is None and intent.shared:
+                response = subject_guides.get(intent.shared[0], {}).get(intent.shared[1])
+            if response is None:
+                response = intent.default.format(subject=subject)
+            response += intent.follow_up
+            return response
+
+    return GENERAL_HEAD + message + GENERAL_TAIL.format(subject=subject)
+
+
+def run(func, number: int) -> float:
+    def loop():
+        for message, subject in QUERIES:
+            func(message, subject)
+    seconds = timeit.timeit(loop, number=number)
+    return seconds / (number * len(QUERIES)) * 1e6
+
+
+def main():
+    # Both implementations must agree before timing means anything
+    for message, subject in QUERIES:
+        assert legacy_enhanced_response(message, subject) == fallback_engine.respond(message, subject)
+
+    number = 20000
+    before = run(legacy_enhanced_response, number)
+    after = run(fallback_engine.respond, number)
+    print(f"Queries per run: {len(QUERIES)}, runs: {number}")
+    print(f"Before (rebuild per call): {before:.2f} µs/call")
+    print(f"After  (FallbackEngine):   {after:.2f} µs/call")
+    print(f"Speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
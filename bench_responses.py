@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for API response encoding.
+
+Compares serialization cost of the stock JSONResponse (json.dumps), FastAPI's pydantic
+fast path for routes with a response_model, and FastJSONResponse (orjson) on a chat reply
+and an upload response, then the bytes on the wire with and without gzip.
+Run from the project root: python bench_responses.py
+
+DATABASE_URL is taken from the environment; without one an in-memory SQLite URL is used
+(needs aiosqlite) since importing the routes builds the engine.
+"""
+
+import datetime
+import gzip
+import os
+import timeit
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from app.config import settings
+from app.responses import FastJSONResponse
+from app.routes.ai_agent import ChatResponse
+from app.services.fallback import fallback_engine, load_knowledge
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def chat_payload() -> ChatResponse:
+    # A long multi-section markdown answer, about the size of a detailed Gemini reply
+    answer = "\n\n".join(
+        fallback_engine.respond(question, "UPSC")
+        for question in ("What is the UPSC syllabus?", "How should I prepare?", "Which books should I read?")
+    )
+    return ChatResponse(response=answer, timestamp=datetime.datetime.now().isoformat(), source="gemini")
+
+
+def upload_payload(files: int = 3) -> dict:
+    text = "\n".join(guide for guides in load_knowledge().values() for guide in guides.values())
+    return {
+        "success": True,
+        "files": [
+            {
+                "id": f"00000000-0000-4000-8000-00000000000{index}",
+                "filename": f"notes-{index}.pdf",
+                "size": 1_482_113,
+                "sha256": "9f" * 32,
+                "deduplicated": False,
+                "type": "application/pdf",
+                "file_path": f"uploads/00000000-0000-4000-8000-00000000000{index}.pdf",
+                "content": text[:5000],
+                "chunks": 42,
+                "pages": 18,
+                "pages_read": 18,
+                "truncated": False,
+                "extraction_cached": False,
+                "status": "done",
+            }
+            for index in range(files)
+        ],
+        "message": f"Successfully processed {files} file(s)",
+    }
+
+
+def per_call_us(func, number: int) -> float:
+    return timeit.timeit(func, number=number) / number * 1e6
+
+
+def serialization(name: str, payload, model=None, number: int = 20000):
+    adapter = TypeAdapter(type(model)) if model is not None else None
+    content = adapter.dump_python(model, mode="json") if model is not None else payload
+    stock = JSONResponse(content).render
+    fast = FastJSONResponse(content).render
+    # Both renderers must produce the same document before timing means anything
+    assert fast(content) == stock(content)
+
+    print(f"\n{name}: {len(stock(content)):,} bytes of JSON")
+    print(f"  JSONResponse (json.dumps):      {per_call_us(lambda: stock(content), number):7.2f} µs")
+    if adapter is not None:
+        # What FastAPI does for response_model routes without a custom response class
+        print(f"  pydantic dump_json fast path:   {per_call_us(lambda: adapter.dump_json(model), number):7.2f} µs")
+        print(f"  FastJSONResponse (dump+orjson): "
+              f"{per_call_us(lambda: fast(adapter.dump_python(model, mode='json')), number):7.2f} µs")
+    else:
+        print(f"  FastJSONResponse (orjson):      {per_call_us(lambda: fast(content), number):7.2f} µs")
+    return fast(content)
+
+
+def wire(name: str, body: bytes, number: int = 500):
+    print(f"\n{name} on the wire:")
+    print(f"  identity: {len(body):7,} bytes")
+    for level in sorted({1, settings.COMPRESSION_LEVEL, 9}):
+        size = len(gzip.compress(body, compresslevel=level))
+        cost = per_call_us(lambda: gzip.compress(body, compresslevel=level), number)
+        marker = "  <- COMPRESSION_LEVEL" if level == settings.COMPRESSION_LEVEL else ""
+        print(f"  gzip -{level}:  {size:7,} bytes ({size / len(body):.0%}), {cost:7.1f} µs{marker}")
+    if brotli is not None:
+        size = len(brotli.compress(body, quality=5))
+        cost = per_call_us(lambda: brotli.compress(body, quality=5), number)
+        print(f"  brotli 5: {size:7,} bytes ({size / len(body):.0%}), {cost:7.1f} µs")
+
+
+def main():
+    chat = chat_payload()
+    chat_body = serialization("ChatResponse", None, model=chat)
+    upload_body = serialization("Upload response (3 files)", upload_payload())
+    wire("ChatResponse", chat_body)
+    wire("Upload response", upload_body)
+    print(f"\nResponses under COMPRESSION_MINIMUM_BYTES={settings.COMPRESSION_MINIMUM_BYTES} are sent uncompressed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark: import time of app.main and time to first response.
+
+Each measurement runs in a fresh interpreter. Time to first response starts uvicorn and
+polls a cheap endpoint until it answers, once with FAST_START off and once with it on.
+Run from the project root: python bench_startup.py [--runs 3]
+
+DATABASE_URL is taken from the environment; without one a throwaway SQLite file is used
+(needs aiosqlite).
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+HEAVY_MODULES = ["google.generativeai", "authlib", "PyPDF2", "numpy"]
+PROBE_PATH = "/api/auth/google/status"
+
+
+def base_env(fast_start: bool) -> dict:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.gettempdir()}/bench_startup.db")
+    env["FAST_START"] = "true" if fast_start else "false"
+    return env
+
+
+def import_time(fast_start: bool) -> float:
+    code = (
+        "import time; started = time.perf_counter(); import app.main; "
+        "print(time.perf_counter() - started)"
+    )
+    output = subprocess.run([sys.executable, "-c", code], env=base_env(fast_start), capture_output=True,
+                            text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def heavy_modules_loaded() -> dict:
+    """Which heavy SDKs importing app.main pulls in, with their cumulative import time (ms)."""
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], env=base_env(True),
+                            capture_output=True, text=True, check=True)
+    loaded = {}
+    for line in output.stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] in HEAVY_MODULES:
+            loaded[parts[2]] = round(int(parts[1]) / 1000, 1)
+    return {name: loaded.get(name, "not imported") for name in HEAVY_MODULES}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_response(fast_start: bool, timeout: float = 60.0) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        env=base_env(fast_start), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{PROBE_PATH}", timeout=1) as response:
+                    response.read()
+                return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"Server did not answer within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print("Heavy modules imported by app.main (cumulative ms):")
+    for name, value in heavy_modules_loaded().items():
+        print(f"  {name:<22} {value}")
+
+    print(f"\nMedian of {args.runs} runs:")
+    for fast_start in (False, True):
+        imports = [import_time(fast_start) for _ in range(args.runs)]
+        first = [time_to_first_response(fast_start) for _ in range(args.runs)]
+        label = "FAST_START=true " if fast_start else "FAST_START=false"
+        print(f"  {label}  import app.main {statistics.median(imports) * 1000:7.1f} ms   "
+              f"first response {statistics.median(first) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -76,7 +76,7 @@ function StudyToolsPage() {
  * Main App Content Component (after authentication)
  */
 function AppContent() {
-  const { user, isLoading, login, logout } = useUser();
+  const { user, isLoading, login, logout, authFetch } = useUser();
   const { 
     messages, 
     isLoading: isChatLoading, 
@@ -115,7 +115,8 @@ function AppContent() {
     try {
 
       // Call the backend API
-      const response = await fetch(api.chat, {
+      // Chat history is saved for the user this token belongs to
+      const response = await authFetch(api.chat, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -123,11 +124,14 @@ function AppContent() {
         body: JSON.stringify({
           message: text,
           subject: activeSubject,
-          user_id: user?.id,
           file_content: fileContent
         }),
       });
 
+      if (response.status === 401) {
+        // Session expired; authFetch has signed the user out
+        return;
+      }
       if (response.ok) {
         const data = await response.json();
         addMessage({ 
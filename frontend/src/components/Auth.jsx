@@ -127,7 +127,8 @@ const Auth = ({ onAuthSuccess }) => {
       
       if (response.ok) {
         // Store user data in localStorage
-        const userData = isLogin ? data.user : data;
+        // Keep the access token with the user so API calls can send it as a bearer token
+        const userData = isLogin ? { ...data.user, access_token: data.access_token } : data;
         localStorage.setItem('user', JSON.stringify(userData));
         onAuthSuccess(userData);
       } else {
@@ -8,18 +8,15 @@ const AuthSuccess = () => {
   const [showWelcome, setShowWelcome] = useState(false);
 
   useEffect(() => {
-    // Parse user data from URL params
-    const urlParams = new URLSearchParams(window.location.search);
-    const userParam = urlParams.get('user');
+    // Parse user data from the URL fragment (it carries the access token, so it's kept out of
+    // the query string), then drop it from the address bar and history
+    const hashParams = new URLSearchParams(window.location.hash.slice(1));
+    const userParam = hashParams.get('user');
+    window.history.replaceState(null, '', window.location.pathname);
     
     if (userParam) {
       try {
-        console.log('Raw user param:', userParam);
-        const decodedParam = decodeURIComponent(userParam);
-        console.log('Decoded user param:', decodedParam);
-        
-        const userData = JSON.parse(decodedParam);
-        console.log('Parsed user data:', userData);
+        const userData = JSON.parse(userParam);
         
         if (userData.is_new_user) {
           setIsNewUser(true);
@@ -37,7 +34,6 @@ const AuthSuccess = () => {
         }
       } catch (error) {
         console.error('Error parsing user data:', error);
-        console.error('User param was:', userParam);
         window.location.href = `/auth-error?error=${encodeURIComponent('Invalid user data: ' + error.message)}`;
       }
     } else {
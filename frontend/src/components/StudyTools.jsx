@@ -41,7 +41,7 @@ const TargetIcon = () => (
 );
 
 function StudyTools({ onBack, selectedExam }) {
-    const { user } = useUser();
+    const { user, authFetch } = useUser();
     const [activeTab, setActiveTab] = useState('overview');
     const [studyPlan, setStudyPlan] = useState(null);
     const [isGenerating, setIsGenerating] = useState(false);
@@ -159,7 +159,7 @@ function StudyTools({ onBack, selectedExam }) {
         const daysRemaining = timeData?.totalDays || 90;
         
         try {
-            const response = await fetch(api.chat, {
+            const response = await authFetch(api.chat, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -173,8 +173,7 @@ function StudyTools({ onBack, selectedExam }) {
                     5. Mock test schedule
                     6. Daily study hours: ${studyHoursPerDay} hours
                     Make it specific and actionable.`,
-                    subject: examName,
-                    user_id: user?.id
+                    subject: examName
                 }),
             });
 
@@ -1,5 +1,6 @@
 import React, { createContext, useContext, useState } from 'react';
 import { api } from '../config/api';
+import { useUser } from './UserContext';
 
 const FileUploadContext = createContext();
 
@@ -14,6 +15,7 @@ export const useFileUpload = () => {
 export const FileUploadProvider = ({ children }) => {
   const [uploadedFiles, setUploadedFiles] = useState([]);
   const [isUploading, setIsUploading] = useState(false);
+  const { authFetch } = useUser();
 
   const uploadFile = async (file) => {
     setIsUploading(true);
@@ -24,7 +26,8 @@ export const FileUploadProvider = ({ children }) => {
       formData.append('files', file);
       
       // Call backend API
-      const response = await fetch(api.files.upload, {
+      // Signed-in uploads belong to the user and are only visible with their token
+      const response = await authFetch(api.files.upload, {
         method: 'POST',
         body: formData,
       });
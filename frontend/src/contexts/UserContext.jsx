@@ -37,10 +37,25 @@ export const UserProvider = ({ children }) => {
     localStorage.removeItem('user');
   };
 
+  // fetch() with the user's bearer token attached. Tokens expire, so a 401 signs the user
+  // out, which takes them back to the login screen instead of quietly failing every request.
+  const authFetch = async (url, options = {}) => {
+    const headers = {
+      ...options.headers,
+      ...(user?.access_token && { Authorization: `Bearer ${user.access_token}` }),
+    };
+    const response = await fetch(url, { ...options, headers });
+    if (response.status === 401 && user?.access_token) {
+      logout();
+    }
+    return response;
+  };
+
   const value = {
     user,
     login,
     logout,
+    authFetch,
     isLoading,
     isAuthenticated: !!user
   };
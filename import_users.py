@@ -0,0 +1,43 @@
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from app.services.user_import import ImportFormatError, detect_format
+
+
+async def run_import(path: Path, fmt: str, report_path: Path) -> bool:
+    """Import users from a CSV/JSONL file and write the per-row report as JSON"""
+    # Imported here so --help works without DATABASE_URL
+    from app.database import async_session, engine
+    from app.services.user_import import import_users, offline_hasher
+
+    try:
+        async with async_session() as session:
+            # No logins to protect here, so hash on every USER_IMPORT_HASH_WORKERS thread
+            result = await import_users(session, path.read_bytes(), fmt, offline_hasher())
+    except ImportFormatError as e:
+        print(f"❌ {e}")
+        return False
+    finally:
+        await engine.dispose()
+
+    report_path.write_text(json.dumps(result, indent=2))
+    print(f"✅ Processed {result['total']} row(s): {result['counts']}")
+    print(f"📋 Per-row report written to {report_path}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-create user accounts from a CSV or JSONL file.")
+    parser.add_argument("file", type=Path, help="CSV with a name,email,password header, or JSONL with those keys")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="defaults to the file extension")
+    parser.add_argument("--report", type=Path, help="where to write the JSON report (default: <file>.report.json)")
+    args = parser.parse_args()
+
+    try:
+        fmt = detect_format(args.file.name, args.format)
+    except ImportFormatError as e:
+        parser.error(str(e))
+    report = args.report or args.file.with_name(args.file.name + ".report.json")
+    sys.exit(0 if asyncio.run(run_import(args.file, fmt, report)) else 1)
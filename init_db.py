@@ -1,29 +1,33 @@
 import asyncio
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine
-from app.models.user import Base
 from app.config import settings
 
-async def init_db():
-    """Initialize database tables"""
+ALEMBIC_INI = Path(__file__).resolve().parent / "alembic.ini"
+
+async def list_tables():
+    engine = create_async_engine(settings.DATABASE_URL, echo=False)
+    async with engine.begin() as conn:
+        result = await conn.execute(text(
+            "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'"
+        ))
+        tables = result.fetchall()
+        print(f"📋 Created tables: {[table[0] for table in tables]}")
+    await engine.dispose()
+
+def init_db():
+    """Initialize database tables by applying the Alembic migrations (same as `alembic upgrade head`)"""
     try:
-        engine = create_async_engine(settings.DATABASE_URL, echo=True)
-        
-        print("Creating database tables...")
-        async with engine.begin() as conn:
-            # Create all tables
-            await conn.run_sync(Base.metadata.create_all)
+        print("Applying database migrations...")
+        command.upgrade(Config(str(ALEMBIC_INI)), "head")
         
         print("✅ Database tables created successfully!")
         
         # Check if tables were created
-        async with engine.begin() as conn:
-            result = await conn.execute(text(
-                "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'"
-            ))
-            tables = result.fetchall()
-            print(f"📋 Created tables: {[table[0] for table in tables]}")
-        
-        await engine.dispose()
+        asyncio.run(list_tables())
         return True
         
     except Exception as e:
@@ -31,5 +35,4 @@ async def init_db():
         return False
 
 if __name__ == "__main__":
-    from sqlalchemy import text
-    asyncio.run(init_db())
\ No newline at end of file
+    init_db()
@@ -0,0 +1,91 @@
+"""Initial schema
+
+Everything create_all used to build on startup. Tables and indexes are created only if
+missing, so databases that were set up by create_all can simply be upgraded.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password", sa.String(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_users_id", "users", ["id"], if_not_exists=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True, if_not_exists=True)
+
+    op.create_table(
+        "chat_cache",
+        sa.Column("key", sa.String(64), primary_key=True),
+        sa.Column("subject", sa.String(), nullable=False),
+        sa.Column("response", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_chat_cache_expires_at", "chat_cache", ["expires_at"], if_not_exists=True)
+
+    op.create_table(
+        "chat_messages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("subject", sa.String(), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("response", sa.Text(), nullable=False),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_chat_messages_user_id_id", "chat_messages", ["user_id", "id"], if_not_exists=True)
+
+    op.create_table(
+        "uploaded_files",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("owner_id", sa.Integer(), nullable=True),
+        sa.Column("filename", sa.String(), nullable=False),
+        sa.Column("content_type", sa.String(), nullable=True),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("sha256", sa.String(64), nullable=False),
+        sa.Column("storage_path", sa.String(), nullable=False),
+        sa.Column("text_path", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        if_not_exists=True,
+    )
+    # Extraction job columns, added separately so tables created before they existed get them too
+    op.add_column(
+        "uploaded_files",
+        sa.Column("status", sa.String(16), nullable=False, server_default="done"),
+        if_not_exists=True,
+    )
+    op.add_column("uploaded_files", sa.Column("error", sa.Text(), nullable=True), if_not_exists=True)
+    op.add_column("uploaded_files", sa.Column("page_count", sa.Integer(), nullable=True), if_not_exists=True)
+    op.add_column("uploaded_files", sa.Column("pages_read", sa.Integer(), nullable=True), if_not_exists=True)
+    op.add_column(
+        "uploaded_files",
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index("ix_uploaded_files_owner_id", "uploaded_files", ["owner_id"], if_not_exists=True)
+    op.create_index("ix_uploaded_files_sha256", "uploaded_files", ["sha256"], if_not_exists=True)
+    op.create_index("ix_uploaded_files_status", "uploaded_files", ["status"], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_table("uploaded_files")
+    op.drop_table("chat_messages")
+    op.drop_table("chat_cache")
+    op.drop_table("users")